@@ -0,0 +1,47 @@
+# api/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends whose entries only exist in the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Response cache invalidation bumps tag versions in the default cache
+    (api/utils/response_cache.py); with a per-process backend the other
+    workers never see the bump and keep serving stale responses.
+    """
+    if not getattr(settings, 'GRAPHQL_RESPONSE_CACHE_TIMEOUT', 0):
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'GRAPHQL_RESPONSE_CACHE_TIMEOUT is set but the default cache ({backend}) is per-process',
+        hint='Configure a shared CACHES backend (e.g. RedisCache) so invalidation reaches every worker, '
+             'or set GRAPHQL_RESPONSE_CACHE_TIMEOUT = 0.',
+        id='api.W001',
+    )]
+
+
+@register()
+def check_shared_change_logs(app_configs, **kwargs):
+    """
+    The in-process product search and autocomplete indexes replay changes
+    logged in the default cache (api/utils/change_log.py); a per-process
+    backend keeps them stale in every worker but the one that saved.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'The default cache ({backend}) is per-process, so in-process search and autocomplete '
+        'indexes only see changes saved by their own worker',
+        hint='Configure a shared CACHES backend (e.g. RedisCache), or run a single worker.',
+        id='api.W002',
+    )]
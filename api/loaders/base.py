@@ -0,0 +1,73 @@
+# api/loaders/base.py
+from collections import defaultdict
+
+
+class DataLoader:
+    """
+    Request-scoped batching loader.
+
+    Resolvers call ``load(key)``. Keys announced up front with ``expect()``
+    (usually the ids of a whole result page) are fetched together with the
+    first key actually requested, so a page costs one ``IN (...)`` query per
+    loader instead of one query per object.
+    """
+    def __init__(self):
+        self._cache = {}
+        self._pending = {}
+
+    def batch_load(self, keys):
+        """Return a dict mapping each key to its value. Missing keys get ``default()``."""
+        raise NotImplementedError
+
+    def default(self):
+        return None
+
+    def expect(self, keys):
+        for key in keys:
+            if key not in self._cache:
+                self._pending[key] = None
+
+    def load(self, key):
+        if key not in self._cache:
+            self.expect([key])
+            self.dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.expect(keys)
+        if self._pending:
+            self.dispatch()
+        return [self._cache[key] for key in keys]
+
+    def dispatch(self):
+        keys = list(self._pending)
+        self._pending = {}
+        if not keys:
+            return
+        results = self.batch_load(keys)
+        for key in keys:
+            self._cache[key] = results[key] if key in results else self.default()
+
+    def prime(self, key, value):
+        self._cache.setdefault(key, value)
+
+    def clear(self, key=None):
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+
+class ListDataLoader(DataLoader):
+    """Loader for one-to-many relations; every key resolves to a list."""
+    def default(self):
+        return []
+
+
+def group_by(objects, key):
+    """Group ``objects`` into a dict of lists keyed by ``getattr(obj, key)``."""
+    grouped = defaultdict(list)
+    for obj in objects:
+        grouped[getattr(obj, key)].append(obj)
+    return grouped
@@ -0,0 +1,34 @@
+# api/loaders/booking.py
+from django.db.models import Count
+from booking.models import Service, Booking
+from api.loaders.base import DataLoader
+
+
+class CountLoader(DataLoader):
+    """Loader for aggregate counts; keys without rows count as 0."""
+    def default(self):
+        return 0
+
+
+class ServiceBookingCountLoader(CountLoader):
+    def batch_load(self, keys):
+        rows = (
+            Booking.objects
+            .filter(service_id__in=keys, status__in=Booking.COUNTED_STATUSES)
+            .order_by()
+            .values('service_id')
+            .annotate(count=Count('pk'))
+        )
+        return {row['service_id']: row['count'] for row in rows}
+
+
+class CategoryServiceCountLoader(CountLoader):
+    def batch_load(self, keys):
+        rows = (
+            Service.objects
+            .filter(category_id__in=keys, is_active=True)
+            .order_by()
+            .values('category_id')
+            .annotate(count=Count('pk'))
+        )
+        return {row['category_id']: row['count'] for row in rows}
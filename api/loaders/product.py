@@ -0,0 +1,44 @@
+# api/loaders/product.py
+from oscar.core.loading import get_model
+from api.loaders.base import ListDataLoader, group_by
+
+ProductImage = get_model('catalogue', 'ProductImage')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+StockRecord = get_model('partner', 'StockRecord')
+
+
+class ProductImagesLoader(ListDataLoader):
+    def batch_load(self, keys):
+        images = ProductImage.objects.filter(product_id__in=keys).order_by('display_order', 'pk')
+        return group_by(images, 'product_id')
+
+
+class ProductCategoriesLoader(ListDataLoader):
+    def batch_load(self, keys):
+        links = (
+            ProductCategory.objects
+            .filter(product_id__in=keys, category__is_public=True)
+            .select_related('category')
+            .order_by('category__path')
+        )
+        grouped = group_by(links, 'product_id')
+        return {key: [link.category for link in links] for key, links in grouped.items()}
+
+
+class ProductStockRecordsLoader(ListDataLoader):
+    def batch_load(self, keys):
+        # Ordered by pk so the first record matches ``stockrecords.first()``
+        stockrecords = StockRecord.objects.filter(product_id__in=keys).order_by('pk')
+        return group_by(stockrecords, 'product_id')
+
+
+class ProductAttributeValuesLoader(ListDataLoader):
+    def batch_load(self, keys):
+        values = (
+            ProductAttributeValue.objects
+            .filter(product_id__in=keys)
+            .select_related('attribute')
+            .order_by('pk')
+        )
+        return group_by(values, 'product_id')
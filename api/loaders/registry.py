@@ -0,0 +1,74 @@
+# api/loaders/registry.py
+from api.loaders.product import (
+    ProductImagesLoader, ProductCategoriesLoader,
+    ProductStockRecordsLoader, ProductAttributeValuesLoader
+)
+from api.loaders.booking import ServiceBookingCountLoader, CategoryServiceCountLoader
+from api.utils.category_tree import get_category_tree
+
+
+class LoaderRegistry:
+    """
+    Holds one instance of every loader for the lifetime of a request.
+    Loaders are created lazily on first attribute access.
+    """
+    loader_classes = {
+        'product_images': ProductImagesLoader,
+        'product_categories': ProductCategoriesLoader,
+        'product_stockrecords': ProductStockRecordsLoader,
+        'product_attribute_values': ProductAttributeValuesLoader,
+        'service_booking_counts': ServiceBookingCountLoader,
+        'category_service_counts': CategoryServiceCountLoader,
+    }
+
+    # Loaders keyed by product id, primed together by expect_products()
+    product_loaders = (
+        'product_images', 'product_categories',
+        'product_stockrecords', 'product_attribute_values',
+    )
+
+    def __getattr__(self, name):
+        try:
+            loader_class = self.loader_classes[name]
+        except KeyError:
+            raise AttributeError(name)
+        loader = loader_class()
+        setattr(self, name, loader)
+        return loader
+
+    @property
+    def category_tree(self):
+        """Category tree snapshot, looked up once per request"""
+        tree = self.__dict__.get('_category_tree')
+        if tree is None:
+            tree = self.__dict__['_category_tree'] = get_category_tree()
+        return tree
+
+    def expect_products(self, products):
+        """Announce a page of products so each relation is fetched in one query."""
+        keys = [product.pk for product in products]
+        for name in self.product_loaders:
+            getattr(self, name).expect(keys)
+
+    def expect_services(self, services):
+        """Announce a page of services (and their categories) for the count loaders."""
+        services = list(services)
+        self.service_booking_counts.expect(service.pk for service in services)
+        self.category_service_counts.expect(service.category_id for service in services)
+
+    def expect_service_categories(self, categories):
+        self.category_service_counts.expect(category.pk for category in categories)
+
+
+def get_loaders(info):
+    """Return the request's LoaderRegistry, creating it if the context has none."""
+    context = info.context
+    loaders = getattr(context, 'loaders', None)
+    if loaders is None:
+        loaders = LoaderRegistry()
+        try:
+            context.loaders = loaders
+        except AttributeError:
+            # No request object (e.g. schema.execute() without context)
+            pass
+    return loaders
@@ -0,0 +1,120 @@
+import json
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from api.utils.benchmark import (
+    PREFIX, OPERATIONS, BenchmarkContext, BenchmarkOperation, generate_dataset, run_benchmark
+)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a weighted mix of GraphQL operations through the schema with concurrent '
+        'workers and report throughput, latency percentiles and queries per operation. '
+        'Mutations write to the database: run it against a disposable one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', action='store_true', help='Generate the synthetic dataset first')
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--services', type=int, default=50)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--customers', type=int, default=100)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=1000, help='Total operations to run (0 = no limit)')
+        parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+        parser.add_argument(
+            '--mix', help='Operation weights, e.g. "catalogue_listing=50,search=50" (others are skipped)'
+        )
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def get_operations(self, mix):
+        if not mix:
+            return OPERATIONS
+        by_name = {operation.name: operation for operation in OPERATIONS}
+        operations = []
+        for item in mix.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip()
+            if name not in by_name:
+                raise CommandError(f'Unknown operation "{name}". Choose from: {", ".join(by_name)}')
+            try:
+                weight = float(weight) if weight else by_name[name].weight
+            except ValueError:
+                raise CommandError(f'Invalid weight for "{name}"')
+            operations.append(BenchmarkOperation(name, weight, by_name[name].build))
+        return operations
+
+    def handle(self, *args, **options):
+        operations = self.get_operations(options['mix'])
+        if not options['requests'] and not options['duration']:
+            raise CommandError('Pass --requests or --duration')
+
+        if options['generate']:
+            self.stdout.write(f'📦 Generating dataset (seed {options["seed"]})...')
+            try:
+                generate_dataset(
+                    products=options['products'], services=options['services'],
+                    bookings=options['bookings'], customers=options['customers'],
+                    seed=options['seed'], batch_size=options['batch_size'],
+                    log=lambda message: self.stdout.write(f'   {message}'),
+                )
+            except Exception as e:
+                raise CommandError(f'Could not generate the dataset ({e}). Is there already "{PREFIX}" data?')
+
+        context = BenchmarkContext()
+        if not context.product_ids or not context.services or not context.customers:
+            raise CommandError('Not enough data to benchmark: run with --generate')
+
+        self.stdout.write(
+            f'🏁 Running {options["requests"] or "unlimited"} operations with {options["workers"]} workers...'
+        )
+        results = run_benchmark(
+            context, operations, workers=options['workers'], requests=options['requests'],
+            duration=options['duration'], seed=options['seed'],
+        )
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'workers': options['workers'],
+                'seed': options['seed'],
+                'mix': {operation.name: operation.weight for operation in operations},
+                'dataset': context.dataset(),
+            },
+            **results,
+        }
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'{"operation":<20}{"count":>7}{"err":>5}{"rps":>9}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}')
+        for name, summary in report['operations'].items():
+            latency = summary['latency_ms']
+            self.stdout.write(
+                f'{name:<20}{summary["count"]:>7}{summary["errors"]:>5}'
+                f'{summary["throughput_rps"] or 0:>9.1f}'
+                + ''.join(f'{latency[p] or 0:>9.1f}' for p in ('p50', 'p95', 'p99'))
+                + f'{summary["queries"]["mean"] or 0:>9.1f}'
+            )
+        totals = report['totals']
+        self.stdout.write(self.style.SUCCESS(
+            f'🎉 {totals["requests"]} operations in {totals["duration_s"]}s '
+            f'({totals["throughput_rps"]} ops/s, {totals["errors"]} with errors)'
+        ))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'📝 Report written to {options["output"]}')
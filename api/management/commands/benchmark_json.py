@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.contrib.auth.models import AnonymousUser
+from api.loaders.registry import LoaderRegistry
+from api.utils.json_encoding import StandardJSONEncoder, OrjsonEncoder, orjson, compare_encoders
+
+PRODUCTS_PAGE = '''
+    query ProductsPage($pageSize: Int) {
+        productsPaginated(pagination: {pageSize: $pageSize}) {
+            results {
+                id title slug description price availability dateCreated
+                images { original caption }
+                categories { id name slug }
+                stockRecords { id price numInStock lowStockThreshold }
+            }
+            pageInfo { totalCount hasNextPage }
+        }
+    }
+'''
+
+
+class Command(BaseCommand):
+    help = 'Compare the GraphQL response encoders on a large products page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--rounds', type=int, default=50)
+
+    def handle(self, *args, **options):
+        from api.schema import schema
+
+        if orjson is None:
+            raise CommandError('orjson is not installed: pip install orjson')
+
+        request = RequestFactory().post('/graphql/')
+        request.user = AnonymousUser()
+        request.loaders = LoaderRegistry()
+        # Past the GRAPHQL_MAX_PAGE_SIZE cap, which only exists for clients
+        with override_settings(GRAPHQL_MAX_PAGE_SIZE=options['page_size']):
+            result = schema.execute(
+                PRODUCTS_PAGE, variable_values={'pageSize': options['page_size']}, context_value=request
+            )
+        if result.errors:
+            raise CommandError(f'Query failed: {result.errors}')
+        items = len(result.data['productsPaginated']['results'])
+        if items < options['page_size']:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Only {items} products in the database (see create_sample_products --scale)'
+            ))
+
+        self.stdout.write(f'🧪 Encoding a {items}-item products page {options["rounds"]} times...')
+        results = compare_encoders(
+            {'data': result.data},
+            {'json (graphene-django)': StandardJSONEncoder(), 'orjson': OrjsonEncoder()},
+            rounds=options['rounds'],
+        )
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'{"encoder":<24}{"mean ms":>10}{"min ms":>10}{"bytes":>10}')
+        for name, stats in results.items():
+            self.stdout.write(f'{name:<24}{stats["mean_ms"]:>10.2f}{stats["min_ms"]:>10.2f}{stats["bytes"]:>10}')
+        baseline, fast = results['json (graphene-django)'], results['orjson']
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 orjson is {baseline["mean_ms"] / fast["mean_ms"]:.1f}x faster'
+        ))
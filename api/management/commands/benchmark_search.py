@@ -0,0 +1,64 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from oscar.core.loading import get_model
+from api.utils.search_index import FULL_TEXT, CONTAINS, FUZZY, search_products
+
+Product = get_model('catalogue', 'Product')
+
+# Words of the generated catalogue (api/utils/benchmark.py), a typo and a
+# term without diacritics
+DEFAULT_TERMS = ['giày', 'điện thoại', 'classic', 'laptpo', 'dong ho']
+
+
+class Command(BaseCommand):
+    help = (
+        'Time product search modes with their indexes against the same queries '
+        'forced to sequential scans. Generate data first, e.g. '
+        'create_sample_products --scale 100 (100k products); the api migrations create the indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', action='append', dest='terms', help='Search term (repeatable)')
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Search indexes need PostgreSQL')
+
+        terms = options['terms'] or DEFAULT_TERMS
+        products = Product.objects.filter(structure='standalone')
+        self.stdout.write(f'🔎 {products.count()} products, {len(terms)} terms, {options["rounds"]} rounds')
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'{"mode":<12}{"term":<14}{"rows":>6}{"indexed ms":>12}{"seq scan ms":>13}{"speedup":>9}')
+
+        for mode in (FULL_TEXT, CONTAINS, FUZZY):
+            for term in terms:
+                queryset = search_products(products, term, mode=mode)
+                if 'rank' in queryset.query.annotations:
+                    queryset = queryset.order_by('-rank', 'pk')
+                else:
+                    queryset = queryset.order_by('pk')
+                rows, indexed = self.time_query(queryset, options)
+                _, sequential = self.time_query(queryset, options, sequential=True)
+                self.stdout.write(
+                    f'{mode:<12}{term:<14}{rows:>6}{indexed:>12.1f}{sequential:>13.1f}'
+                    f'{sequential / indexed if indexed else 0:>8.1f}x'
+                )
+
+    @staticmethod
+    def time_query(queryset, options, sequential=False):
+        # The count is timed too: it scans every match, like totalCount does
+        timings = []
+        for _ in range(options['rounds']):
+            with transaction.atomic(), connection.cursor() as cursor:
+                if sequential:
+                    cursor.execute('SET LOCAL enable_indexscan = off')
+                    cursor.execute('SET LOCAL enable_bitmapscan = off')
+                start = time.perf_counter()
+                rows = queryset.count()
+                list(queryset[:options['page_size']])
+                timings.append((time.perf_counter() - start) * 1000)
+        return rows, statistics.median(timings)
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.utils.inverted_index import build_product_index, get_index_path
+
+class Command(BaseCommand):
+    help = (
+        'Build the in-process product search index from the catalogue and write it '
+        'to PRODUCT_INDEX_PATH, which workers memory-map instead of rebuilding it'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Output file (default: PRODUCT_INDEX_PATH)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Products fetched per query')
+
+    def handle(self, *args, **options):
+        path = options['path'] or get_index_path()
+        if not path:
+            raise CommandError('Set PRODUCT_INDEX_PATH or pass --path')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.stdout.write('🔎 Indexing products...')
+        start = time.perf_counter()
+        index = build_product_index(batch_size=options['batch_size'])
+        self.stdout.write(f'   {len(index)} products, {len(index.terms)} terms in {time.perf_counter() - start:.1f}s')
+
+        index.save(path)
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {path}'))
@@ -1,8 +1,11 @@
-from django.core.management.base import BaseCommand
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
 from django.contrib.auth import get_user_model
 from oscar.core.loading import get_model
 from booking.models import ServiceCategory, Service
 from decimal import Decimal
+from api.utils.benchmark import generate_dataset, delete_dataset
 
 User = get_user_model()
 Product = get_model('catalogue', 'Product')
@@ -11,6 +14,10 @@ Category = get_model('catalogue', 'Category')
 Partner = get_model('partner', 'Partner')
 StockRecord = get_model('partner', 'StockRecord')
 
+# Rows per unit of --scale
+SCALE_UNIT = {'products': 1000, 'services': 10, 'bookings': 10000, 'customers': 200}
+SCALE_PREFIX = 'sample'
+
 class Command(BaseCommand):
     help = 'Create sample products and services for testing'
     
@@ -20,8 +27,24 @@ class Command(BaseCommand):
             action='store_true',
             help='Delete existing sample data before creating new ones',
         )
+        parser.add_argument(
+            '--scale', type=int,
+            help='Bulk-generate N x (1000 products, 10 services, 10000 bookings and payments, '
+                 '200 customers) for profiling instead of the handful of fixed samples',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed for --scale; the same seed and scale give the same data',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk insert and transaction for --scale',
+        )
     
     def handle(self, *args, **options):
+        if options['scale'] is not None:
+            return self.handle_scale(options)
+
         if options['reset']:
             self.stdout.write('🗑️  Resetting sample data...')
             Product.objects.filter(title__startswith='Sample').delete()
@@ -165,3 +188,32 @@ class Command(BaseCommand):
         self.stdout.write('   • Visit GraphiQL: http://localhost:8000/graphql/')
         self.stdout.write('   • Check admin panel: http://localhost:8000/admin/')
         self.stdout.write('\n🚀 Happy testing!')
+
+    def handle_scale(self, options):
+        if options['scale'] < 1:
+            raise CommandError('--scale must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if options['reset']:
+            self.stdout.write(f'🗑️  Deleting "{SCALE_PREFIX}" data...')
+            delete_dataset(prefix=SCALE_PREFIX, log=self.stdout.write)
+
+        counts = {name: per_unit * options['scale'] for name, per_unit in SCALE_UNIT.items()}
+        self.stdout.write(
+            f'📦 Generating {counts["products"]} products, {counts["services"]} services, '
+            f'{counts["bookings"]} bookings and {counts["customers"]} customers...'
+        )
+        started = time.perf_counter()
+        try:
+            generate_dataset(
+                seed=options['seed'], batch_size=options['batch_size'], prefix=SCALE_PREFIX,
+                log=self.stdout.write, **counts
+            )
+        except (ValueError, IntegrityError) as e:
+            raise CommandError(f'Could not generate the data ({e}). Run again with --reset.')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS(
+            f'🎉 Sample data generated in {time.perf_counter() - started:.1f}s'
+        ))
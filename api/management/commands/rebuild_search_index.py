@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from api.utils.search_index import TRIGRAM_INDEXES, ensure_trigram_indexes, rebuild_search_documents
+
+class Command(BaseCommand):
+    help = (
+        'Create the unaccent search configuration and the pg_trgm indexes, '
+        'and rebuild every product search document'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Product ids per transaction')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The product search index needs PostgreSQL')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.stdout.write('🔤 Creating trigram indexes (concurrently)...')
+        ensure_trigram_indexes()
+        self.stdout.write(f'   {", ".join(TRIGRAM_INDEXES)}')
+
+        self.stdout.write('🔎 Rebuilding product search documents...')
+        updated = rebuild_search_documents(
+            batch_size=options['batch_size'], log=lambda message: self.stdout.write(f'   {message}')
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Indexed {updated} products'))
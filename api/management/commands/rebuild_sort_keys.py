@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from api.utils.sort_keys import SORT_INDEXES, ensure_sort_indexes, rebuild_sort_keys
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every product price / popularity sort key and, on PostgreSQL, '
+        'recreate any missing sort index (the api migrations create them). Run '
+        'periodically: analytics scores change without signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Product ids per transaction')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if connection.vendor == 'postgresql':
+            self.stdout.write('🗂️  Creating sort indexes (concurrently)...')
+            ensure_sort_indexes()
+            self.stdout.write(f'   {", ".join(SORT_INDEXES)}')
+
+        self.stdout.write('↕️  Rebuilding product sort keys...')
+        updated = rebuild_sort_keys(
+            batch_size=options['batch_size'], log=lambda message: self.stdout.write(f'   {message}')
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Updated {updated} sort keys'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from booking.signals import refresh_total_bookings_count
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized Service.total_bookings_count column'
+    
+    def handle(self, *args, **options):
+        updated = refresh_total_bookings_count()
+        self.stdout.write(self.style.SUCCESS(f'✅ Refreshed booking counts for {updated} services'))
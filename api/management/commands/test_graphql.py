@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.utils.query_budget import BUDGETS, load_budget_fixtures, run_operation
+
+
+class RollbackFixtures(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Run representative GraphQL operations and check their SQL query and row budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-fixtures', action='store_true',
+            help='Run against the current data instead of the budget fixtures. '
+                 'Fixtures are loaded in a transaction that is rolled back; row '
+                 'budgets assume they are the only data (e.g. a fresh database).'
+        )
+        parser.add_argument(
+            '--operation', action='append', dest='operations',
+            help='Only run the named operation (repeatable)'
+        )
+        parser.add_argument(
+            '--sql', action='store_true',
+            help='Show the SQL of every operation grouped by resolver path'
+        )
+
+    def handle(self, *args, **options):
+        budgets = BUDGETS
+        if options['operations']:
+            unknown = set(options['operations']) - {budget.name for budget in BUDGETS}
+            if unknown:
+                raise CommandError(f'Unknown operations: {", ".join(sorted(unknown))}')
+            budgets = [budget for budget in BUDGETS if budget.name in options['operations']]
+
+        self.stdout.write('🧪 Checking GraphQL query budgets...')
+
+        if options['no_fixtures']:
+            User = get_user_model()
+            viewers = {
+                'staff': User.objects.filter(is_staff=True, is_active=True).first(),
+                'customer': User.objects.filter(is_staff=False, is_active=True).first(),
+            }
+            failures = self.run_budgets(budgets, viewers, options['sql'])
+        else:
+            try:
+                with transaction.atomic():
+                    failures = self.run_budgets(budgets, load_budget_fixtures(), options['sql'])
+                    raise RollbackFixtures
+            except RollbackFixtures:
+                pass
+
+        self.stdout.write('\n' + '='*50)
+        if failures:
+            for result in failures:
+                self.stdout.write(self.style.ERROR(result.report()))
+            raise CommandError(f'{len(failures)} of {len(budgets)} operations exceeded their budget')
+        self.stdout.write(self.style.SUCCESS(f'🎉 All {len(budgets)} operations within budget!'))
+
+    def run_budgets(self, budgets, viewers, show_sql=False):
+        failures = []
+        for budget in budgets:
+            result = run_operation(budget, viewers)
+            summary = (
+                f'{budget.name}: {result.queries}/{budget.max_queries} queries, '
+                f'{result.rows}/{budget.max_rows} rows'
+            )
+            if result.breaches:
+                failures.append(result)
+                self.stdout.write(self.style.ERROR(f'❌ {summary}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ {summary}'))
+            if show_sql:
+                for path, statements in result.capture.by_path().items():
+                    self.stdout.write(f'   {path} ({sum(statements.values())} queries)')
+                    for sql, count in statements.items():
+                        self.stdout.write(f'      {count} x {sql}')
+        return failures
@@ -0,0 +1,72 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations, models
+
+
+def create_search_config(apps, schema_editor):
+    """
+    The PRODUCT_SEARCH_CONFIG text search configuration (see
+    api.utils.search_index.ensure_search_config) and a search document for
+    every existing product. PostgreSQL only.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    config = getattr(settings, 'PRODUCT_SEARCH_CONFIG', 'vietnamese_unaccent')
+    schema_editor.execute(f'''
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{config}') THEN
+                CREATE TEXT SEARCH CONFIGURATION {config} (COPY = simple);
+                ALTER TEXT SEARCH CONFIGURATION {config}
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+            END IF;
+        END $$
+    ''')
+    schema_editor.execute(f'''
+        INSERT INTO api_productsearchdocument (product_id, search_vector, updated_at)
+        SELECT p.id,
+               setweight(to_tsvector('{config}', coalesce(p.title, '')), 'A') ||
+               setweight(to_tsvector('{config}', coalesce(p.description, '')), 'B'),
+               now()
+        FROM catalogue_product p
+        ON CONFLICT (product_id) DO NOTHING
+    ''')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalogue', '0029_product_code'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.CreateModel(
+            name='ProductSortKey',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sort_key', serialize=False, to='catalogue.product')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('popularity', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['price', 'product'], name='product_sort_price'), models.Index(fields=['popularity', 'product'], name='product_sort_popularity')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='catalogue.product')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin')],
+            },
+        ),
+        migrations.RunPython(create_search_config, migrations.RunPython.noop),
+    ]
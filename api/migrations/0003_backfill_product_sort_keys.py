@@ -0,0 +1,40 @@
+from django.db import migrations
+from django.db.models import FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 5000
+
+
+def backfill_sort_keys(apps, schema_editor):
+    """ProductSortKey rows for products created before the model existed"""
+    Product = apps.get_model('catalogue', 'Product')
+    StockRecord = apps.get_model('partner', 'StockRecord')
+    ProductSortKey = apps.get_model('api', 'ProductSortKey')
+
+    # Same values as api.utils.sort_keys._sort_key_rows()
+    primary_price = StockRecord.objects.filter(product=OuterRef('pk')).order_by('pk').values('price')[:1]
+    products = Product.objects.filter(sort_key__isnull=True).order_by('pk').annotate(
+        sort_price=Subquery(primary_price),
+        sort_popularity=Coalesce('stats__score', Value(0.0), output_field=FloatField()),
+    ).values_list('pk', 'sort_price', 'sort_popularity')
+
+    batch = []
+    for pk, price, popularity in products.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ProductSortKey(product_id=pk, price=price, popularity=popularity))
+        if len(batch) >= BATCH_SIZE:
+            ProductSortKey.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ProductSortKey.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_trigram_indexes'),
+        ('analytics', '0003_auto_20200801_0817'),
+        ('partner', '0006_auto_20200724_0909'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sort_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# api.utils.sort_keys.SORT_INDEXES when this migration was written
+SORT_INDEXES = {
+    'product_standalone_title': "(title, id) WHERE structure = 'standalone'",
+    'product_standalone_date_created': "(date_created, id) WHERE structure = 'standalone'",
+}
+
+
+def create_sort_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in SORT_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON catalogue_product {definition}')
+
+
+def drop_sort_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in SORT_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0003_backfill_product_sort_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sort_indexes, drop_sort_indexes),
+    ]
@@ -1,3 +1,50 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-# Create your models here.
+
+class ProductSearchDocument(models.Model):
+    """
+    Stored full-text search vector of a catalogue product: title weighted A,
+    description B, built with the PRODUCT_SEARCH_CONFIG text search
+    configuration (unaccent + simple). Kept current by api/signals.py and
+    rebuilt in bulk by ``manage.py rebuild_search_index``.
+    """
+    product = models.OneToOneField(
+        'catalogue.Product', on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    search_vector = SearchVectorField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'], name='product_search_vector_gin')]
+
+    def __str__(self):
+        return f'Search document of product {self.product_id}'
+
+
+class ProductSortKey(models.Model):
+    """
+    Sort columns of a catalogue product that live on other tables: the
+    primary stock record's price and the analytics score. Each is indexed
+    with the product id, so a sorted page reads the first rows of an
+    index instead of sorting every match. Prices are kept current by
+    api/signals.py; analytics scores are updated with ``.update()``, which
+    sends no signals, so popularity is only refreshed by running
+    ``manage.py rebuild_sort_keys`` periodically (e.g. nightly from cron).
+    """
+    product = models.OneToOneField(
+        'catalogue.Product', on_delete=models.CASCADE, primary_key=True, related_name='sort_key'
+    )
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    popularity = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['price', 'product'], name='product_sort_price'),
+            models.Index(fields=['popularity', 'product'], name='product_sort_popularity'),
+        ]
+
+    def __str__(self):
+        return f'Sort key of product {self.product_id}'
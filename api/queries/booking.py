@@ -7,7 +7,10 @@ from api.types.booking import (
 )
 from api.types.booking_inputs import ServiceFilterInput, TimeSlotFilterInput
 from api.utils.permissions import login_required
-from api.utils.pagination import create_paginated_type, paginate_queryset, PaginationInput
+from api.utils.pagination import create_paginated_type, paginate, PaginationInput
+from api.utils.planner import plan_queryset
+from api.utils.response_cache import add_cache_tags
+from api.loaders.registry import get_loaders
 
 # Create paginated types
 PaginatedServiceType = create_paginated_type(ServiceType, "Service")
@@ -57,7 +60,9 @@ class BookingQuery:
     )
     
     def resolve_service_categories(self, info):
-        return ServiceCategory.objects.filter(is_active=True).order_by('name')
+        categories = list(ServiceCategory.objects.filter(is_active=True).order_by('name'))
+        get_loaders(info).expect_service_categories(categories)
+        return categories
     
     def resolve_service_category(self, info, slug):
         try:
@@ -89,24 +94,30 @@ class BookingQuery:
                 queryset = queryset.filter(available_staff__id=filters['staff_id'])
         
         queryset = queryset.order_by('category__name', 'name')
+        queryset = plan_queryset(queryset, info)
         
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 20) if pagination else 20
-        
-        return paginate_queryset(queryset, page, page_size)
+        result = paginate(queryset, pagination, info=info)
+        get_loaders(info).expect_services(result['results'])
+        return result
     
     def resolve_service(self, info, slug):
         try:
-            return Service.objects.get(slug=slug, is_active=True)
+            service = Service.objects.get(slug=slug, is_active=True)
         except Service.DoesNotExist:
+            add_cache_tags(info, 'service:*')
             return None
+        add_cache_tags(info, f'service:{service.pk}')
+        return service
     
     def resolve_service_by_id(self, info, id):
         try:
-            return Service.objects.get(id=id, is_active=True)
+            service = Service.objects.get(id=id, is_active=True)
         except Service.DoesNotExist:
+            add_cache_tags(info, 'service:*')
             return None
+        add_cache_tags(info, f'service:{service.pk}')
+        return service
     
     def resolve_available_time_slots(self, info, filters=None, pagination=None):
         now = timezone.now()
@@ -134,10 +145,7 @@ class BookingQuery:
         queryset = queryset.order_by('start_datetime')
         
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 50) if pagination else 50
-        
-        return paginate_queryset(queryset, page, page_size)
+        return paginate(queryset, pagination, default_page_size=50, info=info)
     
     def resolve_staff_schedules(self, info, staff_id=None):
         queryset = StaffSchedule.objects.filter(is_available=True)
@@ -156,12 +164,10 @@ class BookingQuery:
             queryset = queryset.filter(status=status)
         
         queryset = queryset.order_by('-created_at')
+        queryset = plan_queryset(queryset, info)
         
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 20) if pagination else 20
-        
-        return paginate_queryset(queryset, page, page_size)
+        return paginate(queryset, pagination, info=info)
     
     @login_required
     def resolve_booking_by_id(self, info, booking_id):
@@ -202,9 +208,7 @@ class BookingQuery:
             queryset = queryset.filter(status=status)
         
         queryset = queryset.order_by('-created_at')
+        queryset = plan_queryset(queryset, info)
         
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 20) if pagination else 20
-        
-        return paginate_queryset(queryset, page, page_size)
\ No newline at end of file
+        return paginate(queryset, pagination, info=info)
\ No newline at end of file
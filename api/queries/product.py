@@ -1,18 +1,36 @@
 import graphene
 from graphene_django import DjangoListField
-from django.db.models import Q
 from oscar.core.loading import get_model
-from api.types.product import ProductType, CategoryType
-from api.utils.pagination import PaginationInput, SortInput, create_paginated_type, paginate_queryset
+from api.types.product import ProductType, CategoryType, FacetType
+from api.utils.pagination import PaginationInput, SortInput, create_paginated_type, paginate
+from api.loaders.registry import get_loaders
+from api.utils.planner import get_selection, plan_queryset
+from api.utils.stock import annotate_primary_stockrecord
+from api.utils.response_cache import add_cache_tags
+from api.utils.search_index import FULL_TEXT, CONTAINS, FUZZY, search_products
+from api.utils.facets import get_product_facets
+from api.utils.sort_keys import sort_products
 
 Product = get_model('catalogue', 'Product')
 Category = get_model('catalogue', 'Category')
 
 # Create paginated types
-PaginatedProductType = create_paginated_type(ProductType, "Product")
+PaginatedProductType = create_paginated_type(ProductType, "Product", extra_fields={
+    # Bucket counts of OSCAR_SEARCH_FACETS over the filtered products
+    "facets": graphene.List(graphene.NonNull(FacetType)),
+})
+
+ProductSearchMode = graphene.Enum('ProductSearchMode', [
+    ('FULL_TEXT', FULL_TEXT),
+    ('CONTAINS', CONTAINS),
+    ('FUZZY', FUZZY),
+])
 
 class ProductFilterInput(graphene.InputObjectType):
     search = graphene.String()
+    # CONTAINS: substring, the original behaviour; FULL_TEXT: words, ranked;
+    # FUZZY: typo tolerant, ranked
+    search_mode = ProductSearchMode(default_value=CONTAINS)
     category_slug = graphene.String()
     min_price = graphene.Float()
     max_price = graphene.Float()
@@ -34,34 +52,42 @@ class ProductQuery:
     )
     
     def resolve_products(self, info, **kwargs):
-        return Product.objects.filter(structure='standalone')
+        queryset = annotate_primary_stockrecord(Product.objects.filter(structure='standalone'))
+        products = list(queryset)
+        get_loaders(info).expect_products(products)
+        return products
     
     def resolve_product(self, info, slug):
         try:
-            return Product.objects.get(slug=slug)
+            product = annotate_primary_stockrecord(Product.objects.all()).get(slug=slug)
         except Product.DoesNotExist:
+            add_cache_tags(info, 'product:*')
             return None
+        add_cache_tags(info, f'product:{product.pk}')
+        return product
     
     def resolve_product_by_id(self, info, id):
         try:
-            return Product.objects.get(id=id)
+            product = annotate_primary_stockrecord(Product.objects.all()).get(id=id)
         except Product.DoesNotExist:
+            add_cache_tags(info, 'product:*')
             return None
+        add_cache_tags(info, f'product:{product.pk}')
+        return product
     
     def resolve_categories(self, info):
         return Category.objects.all()
     
     def resolve_products_paginated(self, info, filters=None, pagination=None, sort=None):
-        queryset = Product.objects.filter(structure='standalone')
+        queryset = annotate_primary_stockrecord(Product.objects.filter(structure='standalone'))
         
         # Apply filters
         if filters:
             if filters.get('search'):
-                search_query = filters['search']
-                queryset = queryset.filter(
-                    Q(title__icontains=search_query) |
-                    Q(description__icontains=search_query)
-                )
+                mode = filters.get('search_mode') or CONTAINS
+                queryset = search_products(queryset, filters['search'], mode=getattr(mode, 'value', mode))
+                if not sort and 'rank' in queryset.query.annotations:
+                    queryset = queryset.order_by('-rank', 'pk')
             
             if filters.get('category_slug'):
                 try:
@@ -71,40 +97,31 @@ class ProductQuery:
                     pass
             
             if filters.get('min_price') is not None:
-                queryset = queryset.filter(stockrecords__price__gte=filters['min_price'])
+                queryset = queryset.filter(primary_price__gte=filters['min_price'])
             
             if filters.get('max_price') is not None:
-                queryset = queryset.filter(stockrecords__price__lte=filters['max_price'])
+                queryset = queryset.filter(primary_price__lte=filters['max_price'])
             
             if filters.get('in_stock') is not None:
                 if filters['in_stock']:
-                    queryset = queryset.filter(stockrecords__num_in_stock__gt=0)
+                    queryset = queryset.filter(primary_num_in_stock__gt=0)
                 else:
-                    queryset = queryset.filter(stockrecords__num_in_stock__lte=0)
+                    queryset = queryset.filter(primary_num_in_stock__lte=0)
+        
+        # Counted before sorting; cached per filter combination
+        facets = get_product_facets(queryset, filters) if 'facets' in get_selection(info) else None
         
         # Apply sorting
         if sort:
-            sort_field = sort.get('field', 'date_created')
-            sort_direction = sort.get('direction', 'DESC')
-            
-            sort_mapping = {
-                'title': 'title',
-                'price': 'stockrecords__price',
-                'date_created': 'date_created',
-                'popularity': '-num_in_stock',  # Example
-            }
-            
-            if sort_field in sort_mapping:
-                order_field = sort_mapping[sort_field]
-                if sort_direction == 'DESC':
-                    order_field = f'-{order_field.lstrip("-")}'
-                queryset = queryset.order_by(order_field)
+            queryset = sort_products(queryset, sort)
         
-        # Remove duplicates
-        queryset = queryset.distinct()
+        # Filters read the primary stock record annotation and sorts join at
+        # most one sort key row, so no joins can duplicate rows and
+        # distinct() is not needed
+        queryset = plan_queryset(queryset, info)
         
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 20) if pagination else 20
-        
-        return paginate_queryset(queryset, page, page_size)
\ No newline at end of file
+        result = paginate(queryset, pagination, info=info)
+        result['facets'] = facets
+        get_loaders(info).expect_products(result['results'])
+        return result
\ No newline at end of file
@@ -0,0 +1,18 @@
+import graphene
+from api.types.search import AutocompleteSuggestionType
+from api.utils.autocomplete import get_autocomplete_index
+
+class AutocompleteQuery:
+    # Search-as-you-type over product titles and service names, served from
+    # the in-memory prefix index (api/utils/autocomplete.py)
+    autocomplete = graphene.List(
+        graphene.NonNull(AutocompleteSuggestionType),
+        prefix=graphene.String(required=True),
+        limit=graphene.Int(default_value=10)
+    )
+    
+    def resolve_autocomplete(self, info, prefix, limit=10):
+        return [
+            AutocompleteSuggestionType(kind=kind, id=pk, label=label, slug=slug)
+            for kind, pk, label, slug in get_autocomplete_index().suggest(prefix, limit)
+        ]
@@ -2,6 +2,8 @@ import graphene
 from api.queries.product import ProductQuery
 from api.queries.basket import BasketQuery
 from api.queries.booking import BookingQuery
+from api.queries.search import AutocompleteQuery
+from api.utils.search import ProductSearchQuery
 from api.mutations.auth import AuthMutation
 from api.mutations.basket import BasketMutation
 from api.mutations.order import OrderMutation
@@ -12,9 +14,11 @@ from api.subscriptions.order import OrderSubscription
 
 class Query(
     ProductQuery, 
+    ProductSearchQuery,
      
     BasketQuery, 
     BookingQuery,
+    AutocompleteQuery,
     graphene.ObjectType
 ):
     pass
@@ -0,0 +1,147 @@
+# api/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from oscar.core.loading import get_model
+from booking.models import Booking, Service, ServiceCategory
+from api.utils.category_tree import invalidate_category_tree
+from api.utils.response_cache import invalidate_tags
+from api.utils.metrics import record_sql
+from api.utils.jwt_cache import token_user_cache
+from api.utils.search_index import search_index_available, update_search_documents
+from api.utils.change_log import product_changes, service_changes
+from api.utils.sort_keys import update_sort_keys
+
+Product = get_model('catalogue', 'Product')
+StockRecord = get_model('partner', 'StockRecord')
+Category = get_model('catalogue', 'Category')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+ProductImage = get_model('catalogue', 'ProductImage')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+User = get_user_model()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_category_tree()
+    invalidate_tags('category:*')
+
+
+# ✅ Response cache invalidation
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    tags = ['product:*', f'product:{instance.pk}']
+    if instance.parent_id:
+        tags.append(f'product:{instance.parent_id}')
+    invalidate_tags(*tags)
+
+
+# ✅ Full-text search documents (deletes cascade to them)
+@receiver(post_save, sender=Product)
+def update_product_search_document(sender, instance, **kwargs):
+    if search_index_available():
+        update_search_documents([instance.pk])
+
+
+# ✅ In-process indexes (product search, autocomplete): every process
+# replays the logged change
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def log_product_change(sender, instance, **kwargs):
+    product_changes.record(instance.pk)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def log_service_change(sender, instance, **kwargs):
+    service_changes.record(instance.pk)
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+def stockrecord_changed(sender, instance, **kwargs):
+    invalidate_tags('product:*', f'product:{instance.product_id}')
+
+
+# Related rows serialized with a product: images, attribute values and
+# category links (saved as ProductCategory rows or through the m2m manager)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def product_relation_changed(sender, instance, **kwargs):
+    invalidate_tags('product:*', f'product:{instance.product_id}')
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def product_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # category.product_set.clear(): pk_set is None, so remember the products now
+        instance._cleared_product_ids = list(
+            ProductCategory.objects.filter(category=instance).values_list('product_id', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        product_ids = [instance.pk]
+    elif action == 'post_clear':
+        product_ids = getattr(instance, '_cleared_product_ids', [])
+    else:
+        product_ids = pk_set or []
+    invalidate_tags('product:*', *(f'product:{pk}' for pk in product_ids))
+
+
+# ✅ Precomputed price / popularity sort keys
+@receiver(post_save, sender=Product)
+def create_product_sort_key(sender, instance, created, **kwargs):
+    if created:
+        update_sort_keys([instance.pk])
+
+
+@receiver(post_save, sender=StockRecord)
+@receiver(post_delete, sender=StockRecord)
+def update_product_sort_key(sender, instance, **kwargs):
+    # After commit: stock records are also deleted while a product delete
+    # cascades, and update_sort_keys() skips products that no longer exist
+    product_id = instance.product_id
+    transaction.on_commit(lambda: update_sort_keys([product_id]))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_changed(sender, instance, **kwargs):
+    invalidate_tags('service:*', f'service:{instance.pk}')
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+def service_category_changed(sender, instance, **kwargs):
+    invalidate_tags('service_category:*')
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    # Services expose totalBookings
+    invalidate_tags('service:*', f'service:{instance.service_id}')
+
+
+# ✅ JWT user cache: saving (e.g. deactivating) or deleting a user drops
+# their cached snapshots
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    token_user_cache.invalidate_user(instance.pk)
+
+
+# ✅ SQL attribution for resolver metrics
+@receiver(connection_created)
+def install_sql_metrics(sender, connection, **kwargs):
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
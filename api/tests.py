@@ -1,3 +1,571 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from oscar.core.loading import get_model
+from graphql import GraphQLError, parse
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.shortcuts import get_token
+from api.schema import schema
+from api.checks import check_shared_cache
+from api.utils import inverted_index
+from api.utils.autocomplete import PRODUCT, SERVICE, TOP_SIZE, PrefixIndex
+from api.utils.change_log import product_changes
+from api.utils.inverted_index import InvertedIndex, get_product_index
+from api.models import ProductSortKey
+from api.utils.documents import query_hash
+from api.views import APIGraphQLView, AsyncAPIGraphQLView, export_products
+from api.utils.category_tree import get_category_tree
+from api.utils.facets import compute_facets
+from api.utils.stock import annotate_primary_stockrecord
+from api.utils.complexity import check_query_limits, clamp_page_size
+from api.utils.jwt_cache import get_user_by_token, token_user_cache
+from api.utils.pagination import encode_cursor, paginate_keyset, paginate_queryset
+from api.utils.response_cache import get_tag_versions
+from api.utils.sort_keys import PRODUCT_SORTS, sort_products
+from api.utils.metrics import FieldTiming, ResolverMetrics
+from api.utils.query_budget import BUDGETS, load_budget_fixtures, assert_within_budget
 
-# Create your tests here.
+Product = get_model('catalogue', 'Product')
+StockRecord = get_model('partner', 'StockRecord')
+Category = get_model('catalogue', 'Category')
+ProductImage = get_model('catalogue', 'ProductImage')
+User = get_user_model()
+ProductClass = get_model('catalogue', 'ProductClass')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+Partner = get_model('partner', 'Partner')
+
+
+class QueryBudgetTests(TestCase):
+    """Representative operations stay within their SQL query and row budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewers = load_budget_fixtures()
+
+    def test_operations_within_budget(self):
+        for budget in BUDGETS:
+            with self.subTest(budget.name):
+                assert_within_budget(budget, self.viewers)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def walk_forward(self, queryset, page_size=4):
+        pks, after = [], None
+        while True:
+            page = paginate_keyset(queryset, page_size, after=after)
+            pks += [product.pk for product in page['results']]
+            after = page['page_info']['end_cursor']
+            if not page['page_info']['has_next_page']:
+                return pks
+
+    def test_forward_matches_offset_order(self):
+        for field in ('title', 'newest', 'price', 'popularity'):
+            with self.subTest(field=field):
+                queryset = sort_products(Product.objects.all(), {'field': field})
+                self.assertEqual(self.walk_forward(queryset), list(queryset.values_list('pk', flat=True)))
+
+    def test_backward_returns_previous_page(self):
+        queryset = sort_products(Product.objects.all(), {'field': 'price', 'direction': 'desc'})
+        first = paginate_keyset(queryset, 4)
+        second = paginate_keyset(queryset, 4, after=first['page_info']['end_cursor'])
+        previous = paginate_keyset(queryset, 4, before=second['page_info']['start_cursor'])
+        self.assertEqual(previous['results'], first['results'])
+        self.assertTrue(previous['page_info']['has_next_page'])
+        self.assertFalse(previous['page_info']['has_previous_page'])
+
+    def test_cursor_without_sort(self):
+        # No ordering at all pages by primary key alone; the model's default
+        # ordering gets the primary key as tie-breaker
+        unordered = Product.objects.order_by()
+        self.assertEqual(self.walk_forward(unordered), sorted(unordered.values_list('pk', flat=True)))
+        default = Product.objects.all()
+        self.assertEqual(self.walk_forward(default), list(default.order_by('-date_created', 'pk').values_list('pk', flat=True)))
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(GraphQLError):
+            paginate_keyset(Product.objects.all(), 4, after='not-a-cursor')
+        with self.assertRaises(GraphQLError):
+            paginate_keyset(Product.objects.order_by('pk'), 4, after=encode_cursor([1, 2]))
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE_TIMEOUT=0)
+class PaginationCountTests(TestCase):
+    QUERY = '''
+        query Page($pagination: PaginationInput) {
+            productsPaginated(pagination: $pagination) { results { id } pageInfo { %s } }
+        }
+    '''
+
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def page(self, fields, **pagination):
+        data = {'query': self.QUERY % fields, 'variables': {'pagination': {'pageSize': 10, **pagination}}}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', json.dumps(data), content_type='application/json')
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql'].upper()]
+        return response.json()['data']['productsPaginated']['pageInfo'], counts
+
+    def test_count_skipped_when_not_selected(self):
+        page_info, counts = self.page('hasNextPage')
+        self.assertEqual(counts, [])
+        self.assertTrue(page_info['hasNextPage'])
+        # The last page learns it is the last from the missing extra row
+        page_info, counts = self.page('hasNextPage', page=3)
+        self.assertEqual(counts, [])
+        self.assertFalse(page_info['hasNextPage'])
+
+    def test_count_when_selected(self):
+        page_info, counts = self.page('totalCount totalPages totalCountIsEstimate')
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(page_info, {'totalCount': 25, 'totalPages': 3, 'totalCountIsEstimate': False})
+
+    def test_estimate_falls_back_to_exact_count(self):
+        # Planner estimates are PostgreSQL only; other backends count
+        page_info, counts = self.page('totalCount totalCountIsEstimate hasNextPage', estimateCount=True, page=3)
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(page_info, {'totalCount': 25, 'totalCountIsEstimate': False, 'hasNextPage': False})
+
+    def test_paginate_queryset_without_count(self):
+        queryset = Product.objects.order_by('pk')
+        with self.assertNumQueries(1):
+            page = paginate_queryset(queryset, page=2, page_size=10, with_count=False)
+        self.assertEqual(page['results'], list(queryset[10:20]))
+        self.assertIsNone(page['page_info']['total_count'])
+        self.assertIsNone(page['page_info']['total_pages'])
+        self.assertTrue(page['page_info']['has_next_page'])
+
+
+class ExportProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    async def read_async(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def test_sync_export(self):
+        response = self.client.get('/api/export/products/', {'chunk_size': 10})
+        self.assertFalse(response.is_async)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        expected = Product.objects.filter(structure='standalone').order_by('pk')
+        self.assertEqual([row['id'] for row in rows], list(expected.values_list('pk', flat=True)))
+        row = rows[1]
+        self.assertEqual(len(row['stock_records']), 2)
+        self.assertEqual(len(row['categories']), 2)
+        self.assertEqual(len(row['images']), 1)
+
+    def test_async_export_matches_sync(self):
+        sync_body = b''.join(self.client.get('/api/export/products/', {'chunk_size': 10}).streaming_content)
+        request = AsyncRequestFactory().get('/api/export/products/', {'chunk_size': 10})
+        response = export_products(request)
+        # Keyset pages are fetched one per await, not buffered by Django
+        self.assertTrue(response.is_async)
+        self.assertEqual(async_to_sync(self.read_async)(response), sync_body)
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE_TIMEOUT=0)
+class ResolverMetricsTests(TestCase):
+    QUERY = 'query MetricsProbe { productsPaginated(pagination: {pageSize: 5}) { results { id title images { id } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def sample(self, text, name, field):
+        prefix = f'{name}{{operation="MetricsProbe",field="{field}"}} '
+        values = [line[len(prefix):] for line in text.splitlines() if line.startswith(prefix)]
+        self.assertEqual(len(values), 1, prefix)
+        return float(values[0])
+
+    def test_metrics_endpoint(self):
+        self.client.post('/graphql/', json.dumps({'query': self.QUERY}), content_type='application/json')
+        response = self.client.get('/health/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        for name in ('graphql_resolver_duration_seconds', 'graphql_resolver_sql_queries', 'graphql_resolver_sql_duration_seconds'):
+            self.assertIn(f'# TYPE {name} histogram', text)
+        self.assertGreaterEqual(self.sample(text, 'graphql_resolver_duration_seconds_count', 'Query.productsPaginated'), 1)
+        # Resolvers are labelled by Type.field, not by response path
+        self.assertGreaterEqual(self.sample(text, 'graphql_resolver_duration_seconds_count', 'ProductType.images'), 5)
+        self.assertGreaterEqual(self.sample(text, 'graphql_resolver_sql_queries_sum', 'Query.productsPaginated'), 1)
+        # Plain scalar reads are not timed
+        self.assertNotIn('field="ProductType.title"', text)
+
+    def test_operation_cap_and_escaping(self):
+        metrics = ResolverMetrics(max_operations=2)
+        timing = FieldTiming()
+        timing.queries = 3
+        for operation in ('First', 'Sec"ond', 'Third'):
+            metrics.observe(operation, 'Query.products', 0.002, timing)
+        text = metrics.render()
+        self.assertIn('graphql_resolver_sql_queries_bucket{operation="First",field="Query.products",le="3"} 1', text)
+        self.assertIn('graphql_resolver_sql_queries_bucket{operation="First",field="Query.products",le="2"} 0', text)
+        self.assertIn('graphql_resolver_sql_queries_count{operation="Sec\\"ond",field="Query.products"} 1', text)
+        # Operations past the cap share one series
+        self.assertIn('graphql_resolver_duration_seconds_count{operation="other",field="Query.products"} 1', text)
+        self.assertNotIn('Third', text)
+
+
+class QueryLimitTests(SimpleTestCase):
+    PAGE_QUERY = '''
+        query Page($size: Int) {
+            productsPaginated(pagination: {pageSize: $size}) { results { id images { id } } }
+        }
+    '''
+
+    def limits(self, size=None, query=None):
+        return check_query_limits(schema.graphql_schema, parse(query or self.PAGE_QUERY), variables={'size': size})
+
+    def test_cost_scales_with_page_size(self):
+        small, _ = self.limits(5)
+        large, _ = self.limits(50)
+        self.assertGreater(large['requestedQueryCost'], small['requestedQueryCost'])
+        self.assertEqual(large['depth'], small['depth'])
+
+    @override_settings(GRAPHQL_MAX_PAGE_SIZE=10)
+    def test_page_size_is_clamped(self):
+        self.assertEqual(clamp_page_size(1000), 10)
+        self.assertEqual(clamp_page_size(0), 1)
+        self.assertEqual(clamp_page_size(None), 1)
+        self.assertEqual(self.limits(1000)[0], self.limits(10)[0])
+
+    @override_settings(GRAPHQL_QUERY_LIMITS={'MAX_COST': 5})
+    def test_cost_limit(self):
+        report, errors = self.limits(20)
+        self.assertEqual([error.extensions['code'] for error in errors], ['QUERY_TOO_COMPLEX'])
+        self.assertEqual(report['maximumAvailable'], 5)
+
+    @override_settings(GRAPHQL_QUERY_LIMITS={'MAX_DEPTH': 2})
+    def test_depth_limit(self):
+        _, errors = self.limits(1)
+        self.assertEqual([error.extensions['code'] for error in errors], ['QUERY_TOO_DEEP'])
+        _, errors = self.limits(query='{ categories { id } }')
+        self.assertEqual(errors, [])
+
+
+@override_settings(GRAPHQL_JWT_USER_CACHE_TIMEOUT=60)
+class TokenUserCacheTests(TestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = User.objects.create_user('jwt-cache', 'jwt-cache@example.com', 'secret')
+        self.token = get_token(self.user)
+        self.assertEqual(get_user_by_token(self.token).pk, self.user.pk)
+
+    def test_cached_user(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_by_token(self.token).username, 'jwt-cache')
+
+    def test_disabled_user(self):
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(JSONWebTokenError):
+            get_user_by_token(self.token)
+
+    def test_deleted_user(self):
+        self.user.delete()
+        self.assertIsNone(get_user_by_token(self.token))
+
+
+class BatchAndPersistedQueryTests(TestCase):
+    QUERY = '{ categories { id } }'
+
+    def setUp(self):
+        # Registered persisted queries live in the cache
+        cache.clear()
+
+    def post(self, data):
+        return self.client.post('/graphql/', json.dumps(data), content_type='application/json')
+
+    def persisted(self, sha256, query=None):
+        data = {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha256}}}
+        if query is not None:
+            data['query'] = query
+        return self.post(data)
+
+    @override_settings(GRAPHQL_MAX_BATCH_SIZE=2)
+    def test_batch_size_limit(self):
+        response = self.post([{'query': self.QUERY}] * 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['status'] for entry in response.json()], [200, 200])
+
+        response = self.post([{'query': self.QUERY}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': [{'message': 'Batch of 3 operations exceeds the limit of 2.'}]})
+
+    def test_persisted_query_hash_mismatch(self):
+        response = self.persisted('0' * 64, self.QUERY)
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'INVALID_PERSISTED_QUERY')
+        # The mismatched document was not registered under either hash
+        for sha256 in ('0' * 64, query_hash(self.QUERY)):
+            response = self.persisted(sha256)
+            self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+
+    def test_persisted_query_lookup(self):
+        sha256 = query_hash(self.QUERY)
+        self.assertIn('data', self.persisted(sha256, self.QUERY).json())
+        self.assertIn('categories', self.persisted(sha256).json()['data'])
+
+
+@override_settings(GRAPHQL_RESPONSE_CACHE_TIMEOUT=0)
+class AsyncViewTests(TestCase):
+    QUERY = json.dumps({'query': '{ categories { id } }'})
+
+    def sync_response(self, headers):
+        request = RequestFactory().post('/graphql/', self.QUERY, content_type='application/json', headers=headers)
+        request.user = AnonymousUser()
+        return json.loads(APIGraphQLView.as_view()(request).content)
+
+    def async_response(self, headers):
+        request = AsyncRequestFactory().post('/graphql/', self.QUERY, content_type='application/json', headers=headers)
+        request.user = AnonymousUser()
+        return json.loads(async_to_sync(AsyncAPIGraphQLView.as_view())(request).content)
+
+    def test_token_of_deleted_user(self):
+        Category.add_root(name='Áo', slug='ao', is_public=True)
+        user = User.objects.create_user('deleted', 'deleted@example.com', 'secret')
+        headers = {'Authorization': f'JWT {get_token(user)}'}
+        user.delete()
+        token_user_cache.clear()
+        response = self.async_response(headers)
+        self.assertNotIn('errors', response)
+        self.assertEqual(response, self.sync_response(headers))
+        self.assertEqual(len(response['data']['categories']), 1)
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        shirts = cls.shirts = ProductClass.objects.create(name='Áo')
+        shoes = cls.shoes = ProductClass.objects.create(name='Giày')
+        clothing = Category.add_root(name='Thời trang', slug='thoi-trang', is_public=True)
+        men = clothing.add_child(name='Nam', slug='nam', is_public=True)
+        clothing.add_child(name='Nữ', slug='nu', is_public=True)
+        Category.add_root(name='Điện tử', slug='dien-tu', is_public=True)
+        partner = Partner.objects.create(name='Kho')
+        for number, (product_class, category, price, rating) in enumerate([
+            (shirts, men, '300000', 4.5),
+            (shirts, men, '700000', 3.2),
+            (shoes, men, '1500000', None),
+            (shoes, clothing, '2500000', 5),
+        ]):
+            product = Product.objects.create(
+                title=f'Sản phẩm {number}', product_class=product_class, structure='standalone', rating=rating
+            )
+            ProductCategory.objects.create(product=product, category=category)
+            if number == 0:
+                ProductCategory.objects.create(product=product, category=clothing)
+            StockRecord.objects.create(product=product, partner=partner, partner_sku=f'sku-{number}', price=Decimal(price))
+
+    def counts(self, filters=None):
+        queryset = annotate_primary_stockrecord(Product.objects.filter(structure='standalone'))
+        if filters:
+            queryset = queryset.filter(categories__slug=filters['category_slug'])
+        get_category_tree()
+        # The product classes, then every bucket in one aggregate pass
+        with self.assertNumQueries(2):
+            facets = compute_facets(queryset, filters)
+        return {facet['key']: {bucket['value']: bucket['count'] for bucket in facet['buckets']} for facet in facets}
+
+    def test_bucket_counts(self):
+        counts = self.counts()
+        self.assertEqual(counts['product_class'], {str(self.shirts.pk): 2, str(self.shoes.pk): 2})
+        self.assertEqual(counts['rating'], {'1': 0, '2': 0, '3': 1, '4': 1, '5': 1})
+        self.assertEqual(counts['category'], {'thoi-trang': 2, 'dien-tu': 0})
+        self.assertEqual(counts['price_range'], {
+            '[0 TO 500000]': 1, '[500000 TO 1000000]': 1, '[1000000 TO 2000000]': 1, '[2000000 TO *]': 1,
+        })
+
+    def test_category_drill_down(self):
+        counts = self.counts({'category_slug': 'nam'})
+        self.assertEqual(counts['product_class'], {str(self.shirts.pk): 2, str(self.shoes.pk): 1})
+        # Children of the filtered category, counted with its filter applied
+        self.assertEqual(counts['category'], {})
+        counts = self.counts({'category_slug': 'thoi-trang'})
+        self.assertEqual(counts['category'], {'nam': 1, 'nu': 0})
+
+
+class ProductSortKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def test_delete_product_with_stock(self):
+        product = Product.objects.filter(stockrecords__isnull=False).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        connection.check_constraints()
+        self.assertFalse(ProductSortKey.objects.filter(product_id=product.pk).exists())
+
+    def test_stockrecord_change_updates_price(self):
+        stockrecord = StockRecord.objects.order_by('pk').first()
+        stockrecord.price = Decimal('123456')
+        with self.captureOnCommitCallbacks(execute=True):
+            stockrecord.save()
+        self.assertEqual(ProductSortKey.objects.get(product_id=stockrecord.product_id).price, Decimal('123456'))
+
+    def test_sort_keeps_products_without_sort_key(self):
+        product = Product.objects.order_by('pk').first()
+        ProductSortKey.objects.filter(product_id=product.pk).delete()
+        for field in PRODUCT_SORTS:
+            with self.subTest(field=field):
+                ordered = sort_products(Product.objects.all(), {'field': field})
+                self.assertEqual(ordered.count(), Product.objects.count())
+                self.assertIn(product.pk, ordered.values_list('pk', flat=True))
+
+
+class ResponseCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def assertInvalidates(self, product, change):
+        tags = ['product:*', f'product:{product.pk}']
+        before = get_tag_versions(tags)
+        change()
+        after = get_tag_versions(tags)
+        for tag in tags:
+            self.assertNotEqual(before[tag], after[tag], tag)
+
+    def test_category_links(self):
+        product = Product.objects.order_by('pk').first()
+        category = Category.objects.exclude(product=product).first()
+        self.assertInvalidates(product, lambda: product.categories.add(category))
+        self.assertInvalidates(product, lambda: category.product_set.remove(product))
+        product.categories.add(category)
+        self.assertInvalidates(product, lambda: category.product_set.clear())
+
+    def test_image_delete(self):
+        image = ProductImage.objects.order_by('pk').first()
+        self.assertInvalidates(image.product, image.delete)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+
+    def test_per_process_cache_warns(self):
+        with self.settings(CACHES=self.LOCMEM, GRAPHQL_RESPONSE_CACHE_TIMEOUT=600):
+            self.assertEqual([message.id for message in check_shared_cache(None)], ['api.W001'])
+        with self.settings(CACHES=self.LOCMEM, GRAPHQL_RESPONSE_CACHE_TIMEOUT=0):
+            self.assertEqual(check_shared_cache(None), [])
+        with self.settings(CACHES=self.REDIS, GRAPHQL_RESPONSE_CACHE_TIMEOUT=600):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class InvertedIndexTests(SimpleTestCase):
+    def build(self):
+        index = InvertedIndex()
+        index.add(1, {'title': 'Áo sơ mi', 'description': 'Áo cotton'})
+        index.add(2, {'title': 'Quần jean', 'description': 'Mặc cùng áo sơ mi trắng'})
+        index.add(3, {'title': 'Giày da', 'description': 'Da bò'})
+        return index
+
+    def test_bm25_ranking(self):
+        index = self.build()
+        # Title terms weigh more than description terms; no match, no hit
+        self.assertEqual([pk for pk, _ in index.search('ao so mi')], [1, 2])
+        self.assertEqual([pk for pk, _ in index.search('giay')], [3])
+        self.assertEqual(index.search('laptop'), [])
+        self.assertEqual([pk for pk, _ in index.search('ao', limit=1)], [1])
+
+    def test_save_load_round_trip(self):
+        index = self.build()
+        index.remove(3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'products.idx')
+            index.save(path)
+            loaded = InvertedIndex.load(path)
+            for query in ('ao so mi', 'jean', 'da'):
+                self.assertEqual(loaded.search(query), index.search(query))
+            # Posting lists over the mapped file are copied on change
+            loaded.add(4, {'title': 'Áo khoác', 'description': ''})
+            loaded.remove(1)
+            self.assertEqual([pk for pk, _ in loaded.search('ao')], [4, 2])
+
+
+class ProductIndexCatchUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        load_budget_fixtures()
+
+    def setUp(self):
+        cache.clear()
+        inverted_index._index = None
+        self.addCleanup(setattr, inverted_index, '_index', None)
+
+    def test_replays_logged_changes(self):
+        index = get_product_index()
+        product = Product.objects.order_by('pk').first()
+        product.title = 'Ấm siêu tốc'
+        product.save()
+        # Another worker's save only reaches this one through the change log
+        self.assertIs(get_product_index(), index)
+        self.assertEqual([pk for pk, _ in index.search('am sieu toc')], [product.pk])
+        self.assertEqual(index.seq, product_changes.current())
+
+    def test_rebuilds_when_changes_cannot_be_replayed(self):
+        index = get_product_index()
+        product_changes.invalidate()
+        rebuilt = get_product_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt), Product.objects.count())
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def build(self):
+        index = PrefixIndex()
+        index.load([
+            (PRODUCT, 1, 'Xe đạp địa hình', 'xe-dap-dia-hinh', 5),
+            (PRODUCT, 2, 'Đạp xe tại chỗ', 'dap-xe-tai-cho', 9),
+            (SERVICE, 1, 'Sửa xe đạp', 'sua-xe-dap', 7),
+            (PRODUCT, 3, 'Đèn xe', 'den-xe', None),
+        ])
+        return index
+
+    def labels(self, index, prefix, limit=10):
+        return [label for _, _, label, _ in index.suggest(prefix, limit)]
+
+    def test_suggest_ranks_by_weight_then_label(self):
+        index = self.build()
+        # Any word may start the match, with or without diacritics
+        self.assertEqual(self.labels(index, 'dap'), ['Đạp xe tại chỗ', 'Sửa xe đạp', 'Xe đạp địa hình'])
+        self.assertEqual(self.labels(index, 'd'), ['Đạp xe tại chỗ', 'Sửa xe đạp', 'Xe đạp địa hình', 'Đèn xe'])
+        self.assertEqual(self.labels(index, 'xe dap'), ['Sửa xe đạp', 'Xe đạp địa hình'])
+        self.assertEqual(self.labels(index, 'de', limit=1), ['Đèn xe'])
+        self.assertEqual(index.suggest('  '), [])
+        self.assertEqual(index.suggest('laptop'), [])
+
+    def test_add_and_remove(self):
+        index = self.build()
+        self.assertEqual(self.labels(index, 'xe dap'), ['Sửa xe đạp', 'Xe đạp địa hình'])
+        index.add(PRODUCT, 4, 'Xe đạp trẻ em', 'xe-dap-tre-em', 8)
+        index.add(PRODUCT, 1, 'Xe máy', 'xe-may', 5)
+        self.assertEqual(self.labels(index, 'xe dap'), ['Xe đạp trẻ em', 'Sửa xe đạp'])
+        self.assertEqual(self.labels(index, 'x'), ['Đạp xe tại chỗ', 'Xe đạp trẻ em', 'Sửa xe đạp', 'Xe máy', 'Đèn xe'])
+        self.assertTrue(index.remove(SERVICE, 1))
+        self.assertFalse(index.remove(SERVICE, 1))
+        self.assertEqual(self.labels(index, 'su'), [])
+        self.assertEqual(self.labels(index, 'xe dap'), ['Xe đạp trẻ em'])
+        self.assertEqual(len(index), 4)
+
+    def test_short_prefix_lists_survive_removals(self):
+        index = PrefixIndex()
+        index.load((PRODUCT, pk, f'Áo {pk}', f'ao-{pk}', pk) for pk in range(TOP_SIZE * 2))
+        for pk in range(TOP_SIZE * 2 - 1, 10, -1):
+            index.remove(PRODUCT, pk)
+        self.assertEqual(self.labels(index, 'a', limit=20), [f'Áo {pk}' for pk in range(10, -1, -1)])
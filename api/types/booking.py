@@ -1,7 +1,13 @@
 import graphene
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from graphene_django import DjangoObjectType
 from booking.models import ServiceCategory, Service, StaffSchedule, TimeSlot, Booking, BookingHistory
 from api.types.user import UserType
+from api.utils.planner import FieldPlan, register_field_plans
+from api.loaders.registry import get_loaders
+
+User = get_user_model()
 
 class ServiceCategoryType(DjangoObjectType):
     services_count = graphene.Int()
@@ -11,7 +17,7 @@ class ServiceCategoryType(DjangoObjectType):
         fields = ('id', 'name', 'slug', 'description', 'image', 'is_active', 'created_at')
     
     def resolve_services_count(self, info):
-        return self.services.filter(is_active=True).count()
+        return get_loaders(info).category_service_counts.load(self.pk)
 
 class ServiceType(DjangoObjectType):
     available_staff = graphene.List(UserType)
@@ -25,6 +31,9 @@ class ServiceType(DjangoObjectType):
                  'max_bookings_per_day', 'image', 'created_at', 'updated_at')
     
     def resolve_available_staff(self, info):
+        # Filled by the query planner's Prefetch on list queries
+        if hasattr(self, 'active_staff'):
+            return self.active_staff
         return self.available_staff.filter(is_active=True)
     
     def resolve_average_rating(self, info):
@@ -32,7 +41,9 @@ class ServiceType(DjangoObjectType):
         return 4.5
     
     def resolve_total_bookings(self, info):
-        return self.bookings.filter(status__in=['confirmed', 'completed']).count()
+        if getattr(settings, 'BOOKING_DENORMALIZED_COUNTS', False):
+            return self.total_bookings_count
+        return get_loaders(info).service_booking_counts.load(self.pk)
 
 class StaffScheduleType(DjangoObjectType):
     weekday_display = graphene.String()
@@ -102,4 +113,23 @@ class BookingType(DjangoObjectType):
 class BookingHistoryType(DjangoObjectType):
     class Meta:
         model = BookingHistory
-        fields = ('id', 'booking', 'previous_status', 'new_status', 'changed_by', 'notes', 'created_at')
\ No newline at end of file
+        fields = ('id', 'booking', 'previous_status', 'new_status', 'changed_by', 'notes', 'created_at')
+
+register_field_plans(Service, {
+    'available_staff': FieldPlan(prefetch=(
+        'available_staff', lambda: User.objects.filter(is_active=True), 'active_staff'
+    )),
+    'average_rating': FieldPlan(),
+    'total_bookings': FieldPlan(only=('total_bookings_count',)),
+})
+
+register_field_plans(ServiceCategory, {
+    'services_count': FieldPlan(),
+})
+
+register_field_plans(Booking, {
+    'duration_minutes': FieldPlan(only=('start_datetime', 'end_datetime')),
+    'can_cancel': FieldPlan(only=('status', 'start_datetime')),
+    'can_reschedule': FieldPlan(only=('status', 'start_datetime')),
+    'time_until_appointment': FieldPlan(only=('start_datetime',)),
+})
@@ -2,6 +2,8 @@
 import graphene
 from graphene_django import DjangoObjectType
 from oscar.core.loading import get_model
+from api.loaders.registry import get_loaders
+from api.utils.planner import FieldPlan, register_field_plans
 
 # Oscar 4.0 models
 Product = get_model('catalogue', 'Product')
@@ -33,7 +35,10 @@ class CategoryType(DjangoObjectType):
         fields = ('id', 'name', 'slug', 'description', 'image', 'is_public')
     
     def resolve_children(self, info):
-        return self.get_children().filter(is_public=True)
+        return get_loaders(info).category_tree.children_of(self)
+    
+    def resolve_parent(self, info):
+        return get_loaders(info).category_tree.parent_of(self)
 
 class ProductClassType(DjangoObjectType):
     class Meta:
@@ -63,6 +68,21 @@ class StockRecordType(DjangoObjectType):
             return f"{self.num_in_stock} in stock"
         return "Out of stock"
 
+def primary_stock(product, info):
+    """
+    Return (price, num_in_stock) of the product's primary stock record, or
+    None. Reads the annotate_primary_stockrecord() annotation when present
+    and falls back to the stock record loader otherwise.
+    """
+    if hasattr(product, 'primary_stockrecord_id'):
+        if product.primary_stockrecord_id is None:
+            return None
+        return product.primary_price, product.primary_num_in_stock
+    stockrecords = get_loaders(info).product_stockrecords.load(product.pk)
+    if not stockrecords:
+        return None
+    return stockrecords[0].price, stockrecords[0].num_in_stock
+
 class ProductType(DjangoObjectType):
     images = graphene.List(ProductImageType)
     categories = graphene.List(CategoryType)
@@ -77,28 +97,53 @@ class ProductType(DjangoObjectType):
                  'date_created', 'date_updated', 'is_public', 'structure')
     
     def resolve_images(self, info):
-        return self.images.all().order_by('display_order')
+        return get_loaders(info).product_images.load(self.pk)
     
     def resolve_categories(self, info):
-        return self.categories.filter(is_public=True)
+        return get_loaders(info).product_categories.load(self.pk)
     
     def resolve_price(self, info):
-        stockrecord = self.stockrecords.first()
-        if stockrecord and stockrecord.price:
-            return f"{stockrecord.price:,.0f}"
+        stock = primary_stock(self, info)
+        if stock and stock[0]:
+            return f"{stock[0]:,.0f}"
         return "0"
     
     def resolve_availability(self, info):
-        stockrecord = self.stockrecords.first()
-        if stockrecord:
-            if stockrecord.num_in_stock > 0:
-                return f"{stockrecord.num_in_stock} in stock"
+        stock = primary_stock(self, info)
+        if stock:
+            if stock[1] > 0:
+                return f"{stock[1]} in stock"
             else:
                 return "Out of stock"
         return "Not available"
     
     def resolve_attributes(self, info):
-        return self.attribute_values.all()
+        return get_loaders(info).product_attribute_values.load(self.pk)
     
     def resolve_stock_records(self, info):
-        return self.stockrecords.all()
\ No newline at end of file
+        return get_loaders(info).product_stockrecords.load(self.pk)
+
+class FacetBucketType(graphene.ObjectType):
+    value = graphene.String(required=True)
+    label = graphene.String(required=True)
+    count = graphene.Int(required=True)
+
+class FacetType(graphene.ObjectType):
+    key = graphene.String(required=True)
+    name = graphene.String(required=True)
+    buckets = graphene.List(graphene.NonNull(FacetBucketType), required=True)
+
+# Relations below are served by the product loaders, not by the planner
+register_field_plans(Product, {
+    'images': FieldPlan(),
+    'categories': FieldPlan(),
+    'price': FieldPlan(),
+    'availability': FieldPlan(),
+    'attributes': FieldPlan(),
+    'stock_records': FieldPlan(),
+})
+
+register_field_plans(Category, {
+    'children': FieldPlan(only=('path', 'depth')),
+    'parent': FieldPlan(only=('path', 'depth')),
+})
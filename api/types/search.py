@@ -0,0 +1,14 @@
+# api/types/search.py
+import graphene
+from api.utils.autocomplete import PRODUCT, SERVICE
+
+AutocompleteKind = graphene.Enum('AutocompleteKind', [
+    ('PRODUCT', PRODUCT),
+    ('SERVICE', SERVICE),
+])
+
+class AutocompleteSuggestionType(graphene.ObjectType):
+    kind = AutocompleteKind(required=True)
+    id = graphene.ID(required=True)
+    label = graphene.String(required=True)
+    slug = graphene.String(required=True)
@@ -8,4 +8,5 @@ urlpatterns = [
     path('', views.health_check, name='health_check'),
     path('status/', views.api_status, name='api_status'),
     path('info/', views.api_info, name='api_info'),
+    path('metrics/', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,75 @@
+# api/utils/async_execution.py
+import asyncio
+import weakref
+from inspect import isawaitable
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db.models import Manager, QuerySet
+from graphene.types.resolver import attr_resolver, dict_or_attr_resolver, dict_resolver
+from graphql import get_named_type, is_leaf_type
+
+DEFAULT_RESOLVERS = (attr_resolver, dict_or_attr_resolver, dict_resolver)
+
+# One semaphore per event loop; it bounds how many sync calls (ORM access,
+# gateway SDKs) run in threads at the same time
+_orm_slots = weakref.WeakKeyDictionary()
+
+
+def get_orm_slots():
+    loop = asyncio.get_running_loop()
+    slots = _orm_slots.get(loop)
+    if slots is None:
+        slots = _orm_slots[loop] = asyncio.Semaphore(
+            getattr(settings, 'GRAPHQL_ASYNC_MAX_THREADS', 10)
+        )
+    return slots
+
+
+def call_and_evaluate(fn, *args, **kwargs):
+    result = fn(*args, **kwargs)
+    # Lazy querysets would otherwise be evaluated on the event loop
+    if isinstance(result, Manager):
+        result = result.all()
+    if isinstance(result, QuerySet):
+        result = list(result)
+    return result
+
+
+async def run_sync(fn, *args, **kwargs):
+    """
+    Run ``fn`` through ``sync_to_async``. Calls are thread sensitive, so one
+    request always uses the same thread (and database connection) and its
+    DataLoaders are never used concurrently.
+    """
+    async with get_orm_slots():
+        result = await sync_to_async(call_and_evaluate)(fn, *args, **kwargs)
+    # Sync wrappers (e.g. permission decorators) around coroutine resolvers
+    if isawaitable(result):
+        result = await result
+    return result
+
+
+def is_default_resolver(resolver):
+    return getattr(resolver, 'func', resolver) in DEFAULT_RESOLVERS
+
+
+class AsyncResolverMiddleware:
+    """
+    Innermost middleware of the async view. Coroutine resolvers run on the
+    event loop; reading a scalar attribute runs inline; every other resolver
+    may touch the ORM and is moved to a thread with run_sync().
+    """
+    def resolve(self, next, root, info, **kwargs):
+        error = getattr(info.context, 'jwt_authentication_error', None)
+        if error is not None and info.path.prev is None:
+            raise error
+        if asyncio.iscoroutinefunction(next):
+            return next(root, info, **kwargs)
+        if is_default_resolver(next) and is_leaf_type(get_named_type(info.return_type)):
+            try:
+                return next(root, info, **kwargs)
+            except SynchronousOnlyOperation:
+                # A deferred column; reading it again in a thread is harmless
+                pass
+        return run_sync(next, root, info, **kwargs)
@@ -0,0 +1,259 @@
+# api/utils/autocomplete.py
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import groupby
+from django.core.cache import cache
+from oscar.core.loading import get_model
+from booking.models import Service
+from api.utils.change_log import product_changes, service_changes
+from api.utils.documents import LRUCache
+from api.utils.inverted_index import tokenize
+
+Product = get_model('catalogue', 'Product')
+
+# AutocompleteKind values
+PRODUCT = 'product'
+SERVICE = 'service'
+
+MAX_LIMIT = 20
+# Longest key stored per word of a label
+MAX_KEY_LENGTH = 64
+# Prefixes matching more keys than this have their best MAX_LIMIT entries
+# memoized until an entry they match changes
+MEMO_MIN_RANGE = 64
+# Prefixes up to this long match a large share of the keys, so their best
+# entries are kept up to date on every change instead: TOP_SIZE of them,
+# rescanned only once removals leave fewer than MAX_LIMIT of a longer list
+TOP_PREFIX_LENGTH = 2
+TOP_SIZE = MAX_LIMIT * 4
+
+
+class PrefixIndex:
+    """
+    Autocomplete over weighted (kind, pk) entries. Every word of an entry's
+    folded label starts a key, so "dap" finds "Xe đạp" as well as "Đạp
+    xe"; all keys live in one sorted list, and a prefix is answered by
+    bisecting to its key range and keeping the heaviest entries. One and
+    two character prefixes are answered from precomputed lists instead.
+    """
+    def __init__(self, seqs=None):
+        self.seqs = dict(seqs or {})
+        self.keys = []      # sorted (key, kind, pk)
+        self.entries = {}   # (kind, pk) -> (label, slug, weight)
+        # short prefix -> [best TOP_SIZE rank keys, True when more entries match]
+        self._top = {}
+        self._memo = LRUCache(maxsize=10000)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _keys(label):
+        words = tokenize(label)
+        return {' '.join(words[start:])[:MAX_KEY_LENGTH] for start in range(len(words))}
+
+    @staticmethod
+    def _short_prefixes(keys):
+        # Every key starts with a word; folded queries never end with a space
+        prefixes = set()
+        for key in keys:
+            for end in range(1, TOP_PREFIX_LENGTH + 1):
+                prefix = key[:end]
+                if prefix[-1] == ' ':
+                    break
+                prefixes.add(prefix)
+        return prefixes
+
+    @staticmethod
+    def _rank(kind, pk, entry):
+        # Heaviest first, then by label
+        label, _, weight = entry
+        return (-weight, label, kind, pk)
+
+    def load(self, rows):
+        """Bulk add (kind, pk, label, slug, weight) rows of new entries, sorting once"""
+        with self._lock:
+            for kind, pk, label, slug, weight in rows:
+                self.entries[kind, pk] = (label, slug, weight or 0)
+                self.keys.extend((key, kind, pk) for key in self._keys(label))
+            self.keys.sort()
+            self._memo.clear()
+            self._build_top()
+
+    def _build_top(self):
+        # Entry positions in rank order, collected per short prefix from the
+        # sorted keys, where each prefix is a contiguous run
+        ranks = sorted(self._rank(kind, pk, entry) for (kind, pk), entry in self.entries.items())
+        order = {(rank[2], rank[3]): position for position, rank in enumerate(ranks)}
+        positions = {}
+        for head, group in groupby(self.keys, key=lambda item: item[0][:TOP_PREFIX_LENGTH]):
+            matches = {order[kind, pk] for _, kind, pk in group}
+            for prefix in self._short_prefixes([head]):
+                positions.setdefault(prefix, set()).update(matches)
+        self._top = {
+            prefix: [[ranks[position] for position in heapq.nsmallest(TOP_SIZE, matches)], len(matches) > TOP_SIZE]
+            for prefix, matches in positions.items()
+        }
+
+    def add(self, kind, pk, label, slug, weight=0):
+        with self._lock:
+            self.remove(kind, pk)
+            entry = self.entries[kind, pk] = (label, slug, weight or 0)
+            keys = self._keys(label)
+            for key in keys:
+                insort(self.keys, (key, kind, pk))
+            rank = self._rank(kind, pk, entry)
+            for prefix in self._short_prefixes(keys):
+                top = self._top.setdefault(prefix, [[], False])
+                insort(top[0], rank)
+                if len(top[0]) > TOP_SIZE:
+                    del top[0][TOP_SIZE:]
+                    top[1] = True
+            self._forget(keys)
+
+    def remove(self, kind, pk):
+        with self._lock:
+            entry = self.entries.pop((kind, pk), None)
+            if entry is None:
+                return False
+            keys = self._keys(entry[0])
+            for key in keys:
+                position = bisect_left(self.keys, (key, kind, pk))
+                if position < len(self.keys) and self.keys[position] == (key, kind, pk):
+                    del self.keys[position]
+            rank = self._rank(kind, pk, entry)
+            for prefix in self._short_prefixes(keys):
+                top = self._top.get(prefix)
+                if top is None:
+                    continue
+                position = bisect_left(top[0], rank)
+                if position < len(top[0]) and top[0][position] == rank:
+                    del top[0][position]
+                    if top[1] and len(top[0]) < MAX_LIMIT:
+                        self._top[prefix] = self._scan_top(prefix)
+            self._forget(keys)
+            return True
+
+    def _forget(self, keys):
+        """Drop the memoized prefixes of ``keys`` (short prefixes are never memoized)"""
+        for key in keys:
+            for end in range(TOP_PREFIX_LENGTH + 1, len(key) + 1):
+                self._memo.pop(key[:end])
+
+    def _key_range(self, prefix):
+        start = bisect_left(self.keys, (prefix,))
+        return start, bisect_left(self.keys, (prefix + '\uffff',), start)
+
+    def _scan_top(self, prefix):
+        start, end = self._key_range(prefix)
+        entries = self.entries
+        matches = {self._rank(kind, pk, entries[kind, pk]) for _, kind, pk in self.keys[start:end]}
+        return [heapq.nsmallest(TOP_SIZE, matches), len(matches) > TOP_SIZE]
+
+    def suggest(self, prefix, limit=10):
+        """[(kind, pk, label, slug)] of the heaviest entries with a word starting with ``prefix``"""
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+        limit = max(1, min(limit, MAX_LIMIT))
+        if len(prefix) <= TOP_PREFIX_LENGTH:
+            with self._lock:
+                top = self._top.get(prefix)
+                ranks = top[0][:limit] if top else []
+                return [(kind, pk, *self.entries[kind, pk][:2]) for _, _, kind, pk in ranks]
+        best = self._memo.get(prefix)
+        if best is None:
+            with self._lock:
+                start, end = self._key_range(prefix)
+                entries = self.entries
+                best = heapq.nsmallest(
+                    MAX_LIMIT, {self._rank(kind, pk, entries[kind, pk]) for _, kind, pk in self.keys[start:end]}
+                )
+                best = [(kind, pk, *entries[kind, pk][:2]) for _, _, kind, pk in best]
+                if end - start > MEMO_MIN_RANGE:
+                    self._memo.set(prefix, best)
+        return best[:limit]
+
+
+# ✅ Catalogue sources: public canonical products weighted by their
+# analytics score, active services by their number of bookings
+def _product_rows(pks=None):
+    queryset = Product.objects.filter(parent=None, is_public=True)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    rows = queryset.values_list('pk', 'title', 'slug', 'stats__score')
+    for pk, title, slug, score in rows.iterator(chunk_size=2000):
+        yield PRODUCT, pk, title, slug, score
+
+
+def _service_rows(pks=None):
+    queryset = Service.objects.filter(is_active=True)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    rows = queryset.values_list('pk', 'name', 'slug', 'total_bookings_count')
+    for pk, name, slug, bookings in rows.iterator(chunk_size=2000):
+        yield SERVICE, pk, name, slug, bookings
+
+
+SOURCES = {
+    PRODUCT: (product_changes, _product_rows),
+    SERVICE: (service_changes, _service_rows),
+}
+
+
+def _current_seqs():
+    # One cache round trip per request
+    values = cache.get_many([changes.seq_key for changes, _ in SOURCES.values()])
+    return {kind: values.get(changes.seq_key, 0) for kind, (changes, _) in SOURCES.items()}
+
+
+def build_autocomplete_index():
+    # Read the sequences first: changes made during the build are replayed
+    index = PrefixIndex(seqs=_current_seqs())
+    for _, rows in SOURCES.values():
+        index.load(rows())
+    return index
+
+
+def _catch_up(index, seqs):
+    """Replay the logged changes of every source; None when a rebuild is needed"""
+    changed = {}
+    for kind, (changes, _) in SOURCES.items():
+        pks = changes.changes(index.seqs.get(kind, 0), seqs[kind])
+        if pks is None:
+            return None
+        changed[kind] = pks
+    for kind, pks in changed.items():
+        # Changed rows are re-added; pks no longer listed were deleted or hidden
+        for row in SOURCES[kind][1](pks):
+            index.add(*row)
+            pks.discard(row[1])
+        for pk in pks:
+            index.remove(kind, pk)
+    index.seqs = seqs
+    return index
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_autocomplete_index():
+    """
+    Return this process's autocomplete index, built on first use and kept
+    current with the logged product and service changes (api/signals.py),
+    which other workers' changes only reach through a shared cache.
+    """
+    global _index
+    seqs = _current_seqs()
+    index = _index
+    if index is not None and index.seqs == seqs:
+        return index
+    with _lock:
+        if _index is None:
+            _index = build_autocomplete_index()
+        elif _index.seqs != seqs:
+            _index = _catch_up(_index, seqs) or build_autocomplete_index()
+        return _index
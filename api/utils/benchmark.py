@@ -0,0 +1,488 @@
+# api/utils/benchmark.py
+import itertools
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as dt_time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from oscar.core.loading import get_model
+from booking.models import ServiceCategory, Service, TimeSlot, Booking, StaffSchedule
+from booking.signals import refresh_total_bookings_count
+from payments.models import PaymentTransaction
+from api.loaders.registry import LoaderRegistry
+from api.utils.category_tree import invalidate_category_tree
+from api.utils.change_log import product_changes, service_changes
+from api.utils.response_cache import invalidate_tags
+from api.utils.search_index import search_index_available, rebuild_search_documents
+from api.utils.sort_keys import rebuild_sort_keys
+
+User = get_user_model()
+Product = get_model('catalogue', 'Product')
+ProductClass = get_model('catalogue', 'ProductClass')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+Category = get_model('catalogue', 'Category')
+Partner = get_model('partner', 'Partner')
+StockRecord = get_model('partner', 'StockRecord')
+
+# Every generated row is recognisable by this prefix (slugs, usernames, SKUs)
+PREFIX = 'bench'
+
+WORDS = [
+    'áo', 'quần', 'giày', 'túi', 'đồng hồ', 'điện thoại', 'laptop', 'tai nghe',
+    'sách', 'bàn', 'ghế', 'đèn', 'nồi', 'chảo', 'kem', 'son', 'nước hoa',
+    'cotton', 'da', 'gỗ', 'thép', 'nhựa', 'mini', 'pro', 'max', 'classic',
+    'đen', 'trắng', 'đỏ', 'xanh', 'vàng', 'hồng', 'nam', 'nữ', 'trẻ em',
+]
+BOOKING_STATUSES = ['completed', 'confirmed', 'pending', 'cancelled', 'no_show']
+BOOKING_STATUS_WEIGHTS = [50, 20, 15, 10, 5]
+# Payment status by booking status; cancelled bookings are refunded half the time
+PAYMENT_STATUSES = {
+    'completed': 'success', 'confirmed': 'success', 'no_show': 'success',
+    'pending': 'pending', 'cancelled': 'cancelled',
+}
+PAYMENT_METHODS = ['vnpay', 'momo', 'zalopay', 'cash']
+PAYMENT_METHOD_WEIGHTS = [50, 20, 10, 20]
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(start + batch_size, total)
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def generate_dataset(products=1000, services=50, bookings=10000, customers=100,
+                     seed=0, batch_size=2000, prefix=PREFIX, log=print):
+    """
+    Bulk-create a deterministic synthetic dataset. The same arguments always
+    produce the same rows (dates are relative to now), so runs on different
+    commits are comparable.
+    Every batch is its own transaction, so millions of rows do not need one
+    huge transaction; an interrupted run is removed with delete_dataset().
+    Signals do not fire for bulk inserts; denormalized counts and caches are
+    refreshed at the end.
+    """
+    if ProductClass.objects.filter(slug=prefix).exists():
+        raise ValueError(f'There is already "{prefix}" data')
+    rng = random.Random(seed)
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    label = prefix.capitalize()
+
+    with transaction.atomic():
+        product_class, _ = ProductClass.objects.get_or_create(
+            slug=prefix, defaults={'name': label, 'track_stock': True}
+        )
+        partner, _ = Partner.objects.get_or_create(code=prefix, defaults={'name': f'{label} partner'})
+
+        log('Categories...')
+        categories = []
+        for i in range(10):
+            root = Category.add_root(name=f'{label} {i}', slug=f'{prefix}-{i}', is_public=True)
+            categories.append(root)
+            for j in range(10):
+                categories.append(root.add_child(
+                    name=f'{label} {i}.{j}', slug=f'{prefix}-{i}-{j}', is_public=True
+                ))
+
+    log(f'{products} products...')
+    for start, end in _batches(products, batch_size):
+        with transaction.atomic():
+            batch = Product.objects.bulk_create([
+                Product(
+                    title=' '.join(rng.sample(WORDS, 3)).capitalize() + f' {i}',
+                    slug=f'{prefix}-product-{i}',
+                    description=' '.join(rng.choices(WORDS, k=30)),
+                    product_class=product_class,
+                    structure='standalone',
+                    is_public=True,
+                )
+                for i in range(start, end)
+            ])
+            ProductCategory.objects.bulk_create([
+                ProductCategory(product=product, category=category)
+                for product in batch
+                for category in rng.sample(categories, 2)
+            ])
+            StockRecord.objects.bulk_create([
+                StockRecord(
+                    product=product, partner=partner, partner_sku=f'{prefix}-{product.pk}-{n}',
+                    price=Decimal(rng.randrange(10, 5000) * 1000), num_in_stock=rng.randrange(0, 50),
+                )
+                for product in batch
+                for n in range(rng.choice((1, 1, 1, 2)))
+            ])
+
+    log(f'{customers} customers and staff...')
+    password = make_password(prefix)
+    staff_count = max(5, services // 5)
+    for start, end in _batches(customers, batch_size):
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=f'{prefix}-customer-{i}', email=f'{prefix}-customer-{i}@example.com',
+                     password=password)
+                for i in range(start, end)
+            ])
+    with transaction.atomic():
+        staff = User.objects.bulk_create([
+            User(username=f'{prefix}-staff-{i}', email=f'{prefix}-staff-{i}@example.com',
+                 password=password, is_staff=True)
+            for i in range(staff_count)
+        ])
+        # Monday to Saturday, with a later shift for every other member
+        StaffSchedule.objects.bulk_create([
+            StaffSchedule(
+                staff=user, weekday=weekday,
+                start_time=dt_time(8 + 2 * (n % 2)), end_time=dt_time(17 + 2 * (n % 2)),
+                is_available=weekday < 6,
+            )
+            for n, user in enumerate(staff)
+            for weekday in range(7)
+        ])
+    customer_ids = list(
+        User.objects.filter(username__startswith=f'{prefix}-customer-').order_by('pk')
+        .values_list('pk', 'username', 'email')
+    )
+
+    log(f'{services} services and time slots...')
+    with transaction.atomic():
+        service_categories = ServiceCategory.objects.bulk_create([
+            ServiceCategory(name=f'{label} services {i}', slug=f'{prefix}-services-{i}')
+            for i in range(5)
+        ])
+        service_objects = Service.objects.bulk_create([
+            Service(
+                name=f'{label} service {i}', slug=f'{prefix}-service-{i}',
+                category=service_categories[i % len(service_categories)],
+                description=' '.join(rng.choices(WORDS, k=10)),
+                duration_minutes=rng.choice((30, 45, 60, 90)),
+                price=Decimal(rng.randrange(100, 2000) * 1000),
+            )
+            for i in range(services)
+        ])
+        service_staff = {}
+        Through = Service.available_staff.through
+        links = []
+        for service in service_objects:
+            service_staff[service.pk] = rng.sample(staff, min(3, len(staff)))
+            links.extend(Through(service_id=service.pk, user_id=user.pk) for user in service_staff[service.pk])
+        Through.objects.bulk_create(links)
+    for start, end in _batches(len(service_objects), max(batch_size // 112, 1)):
+        with transaction.atomic():
+            TimeSlot.objects.bulk_create([
+                TimeSlot(
+                    service=service, staff=user,
+                    start_datetime=now + timedelta(days=day, hours=hour),
+                    end_datetime=now + timedelta(days=day, hours=hour, minutes=service.duration_minutes),
+                )
+                for service in service_objects[start:end]
+                for user in service_staff[service.pk][:1]
+                for day in range(1, 15)
+                for hour in range(8, 16)
+            ], ignore_conflicts=True)
+
+    log(f'{bookings} bookings and payments...')
+    for start, end in _batches(bookings, batch_size):
+        batch = []
+        for _ in range(start, end):
+            service = rng.choice(service_objects)
+            customer_id, username, email = rng.choice(customer_ids)
+            start_datetime = now + timedelta(hours=rng.randrange(-365 * 24, 60 * 24))
+            batch.append(Booking(
+                booking_id=_uuid(rng),
+                customer_id=customer_id, service=service, staff=rng.choice(service_staff[service.pk]),
+                start_datetime=start_datetime,
+                end_datetime=start_datetime + timedelta(minutes=service.duration_minutes),
+                status=rng.choices(BOOKING_STATUSES, BOOKING_STATUS_WEIGHTS)[0],
+                customer_name=username, customer_email=email,
+                customer_phone='0900000000',
+                original_price=service.price, final_price=service.price,
+            ))
+        with transaction.atomic():
+            Booking.objects.bulk_create(batch)
+            payments = []
+            for booking in batch:
+                status = PAYMENT_STATUSES[booking.status]
+                if status == 'cancelled' and rng.random() < 0.5:
+                    status = 'refunded'
+                paid = status in ('success', 'refunded')
+                payments.append(PaymentTransaction(
+                    transaction_id=f'{prefix.upper()}{booking.pk}',
+                    booking=booking,
+                    payment_method=rng.choices(PAYMENT_METHODS, PAYMENT_METHOD_WEIGHTS)[0],
+                    amount=booking.final_price,
+                    status=status,
+                    gateway_transaction_id=str(rng.randrange(10 ** 8, 10 ** 9)) if paid else '',
+                    gateway_response_code='00' if paid else '',
+                    completed_at=booking.start_datetime - timedelta(hours=rng.randrange(1, 72)) if paid else None,
+                ))
+            PaymentTransaction.objects.bulk_create(payments)
+        log(f'  {end}/{bookings}')
+
+    refresh_total_bookings_count([service.pk for service in service_objects])
+    log('Sort keys...')
+    rebuild_sort_keys(batch_size, log=log)
+    if search_index_available():
+        log('Search documents...')
+        rebuild_search_documents(batch_size, log=log)
+    invalidate_category_tree()
+    product_changes.invalidate()
+    service_changes.invalidate()
+    invalidate_tags('product:*', 'category:*', 'service:*', 'service_category:*')
+
+
+def delete_dataset(prefix=PREFIX, log=print):
+    """Remove the rows generate_dataset() created with ``prefix``"""
+    service_ids = list(Service.objects.filter(slug__startswith=f'{prefix}-service-').values_list('pk', flat=True))
+    users = User.objects.filter(username__startswith=f'{prefix}-')
+    steps = [
+        ('payments', PaymentTransaction.objects.filter(booking__service_id__in=service_ids)),
+        ('bookings', Booking.objects.filter(service_id__in=service_ids)),
+        ('time slots', TimeSlot.objects.filter(service_id__in=service_ids)),
+        ('services', Service.objects.filter(pk__in=service_ids)),
+        ('service categories', ServiceCategory.objects.filter(slug__startswith=f'{prefix}-services-')),
+        ('staff schedules', StaffSchedule.objects.filter(staff__in=users)),
+        ('users', users),
+        ('stock records', StockRecord.objects.filter(partner__code=prefix)),
+        ('products', Product.objects.filter(slug__startswith=f'{prefix}-product-')),
+        ('categories', Category.objects.filter(slug__startswith=f'{prefix}-')),
+        ('product class', ProductClass.objects.filter(slug=prefix)),
+        ('partner', Partner.objects.filter(code=prefix)),
+    ]
+    for name, queryset in steps:
+        with transaction.atomic():
+            deleted, _ = queryset.delete()
+        log(f'{name}: {deleted} rows deleted')
+    invalidate_category_tree()
+    product_changes.invalidate()
+    service_changes.invalidate()
+    invalidate_tags('product:*', 'category:*', 'service:*', 'service_category:*')
+
+
+class BenchmarkContext:
+    """Ids and viewers the operations pick from, loaded once per run"""
+    def __init__(self, sample_size=1000):
+        self.product_ids = list(
+            Product.objects.filter(is_public=True, structure='standalone')
+            .order_by('?').values_list('pk', flat=True)[:sample_size]
+        )
+        self.category_slugs = list(Category.objects.filter(is_public=True).values_list('slug', flat=True))
+        self.services = [
+            (service.pk, [user.pk for user in service.available_staff.all()])
+            for service in Service.objects.filter(is_active=True).prefetch_related('available_staff')[:sample_size]
+        ]
+        self.services = [(service_id, staff) for service_id, staff in self.services if staff]
+        self.customers = list(User.objects.filter(is_staff=False, is_active=True).order_by('pk')[:100])
+        self.total_products = Product.objects.count()
+        self.total_bookings = Booking.objects.count()
+
+    def dataset(self):
+        return {
+            'products': self.total_products,
+            'bookings': self.total_bookings,
+            'services': Service.objects.count(),
+            'categories': len(self.category_slugs),
+        }
+
+
+class BenchmarkOperation:
+    """
+    A weighted operation of the mix. ``build(context, rng)`` returns
+    ``(query, variables, user)``.
+    """
+    def __init__(self, name, weight, build):
+        self.name = name
+        self.weight = weight
+        self.build = build
+
+
+def _catalogue_listing(context, rng):
+    filters = {'categorySlug': rng.choice(context.category_slugs)} if rng.random() < 0.5 else {}
+    return '''
+        query CatalogueListing($filters: ProductFilterInput, $pagination: PaginationInput) {
+            productsPaginated(filters: $filters, pagination: $pagination) {
+                results { id title slug price availability images { original } categories { name } }
+                pageInfo { hasNextPage }
+            }
+        }
+    ''', {'filters': filters, 'pagination': {'page': rng.randint(1, 5), 'pageSize': 20}}, None
+
+
+def _search(context, rng):
+    return '''
+        query Search($filters: ProductFilterInput) {
+            productsPaginated(filters: $filters, pagination: {pageSize: 20}) {
+                results { id title price }
+                pageInfo { totalCount }
+            }
+        }
+    ''', {'filters': {'search': rng.choice(WORDS)}}, None
+
+
+def _availability(context, rng):
+    service_id, staff = rng.choice(context.services)
+    return '''
+        query Availability($filters: TimeSlotFilterInput) {
+            availableTimeSlots(filters: $filters, pagination: {pageSize: 50}) {
+                results { id startDatetime endDatetime }
+            }
+        }
+    ''', {'filters': {'serviceId': service_id}}, None
+
+
+def _create_booking(context, rng):
+    service_id, staff = rng.choice(context.services)
+    customer = rng.choice(context.customers)
+    start = timezone.now().replace(second=0, microsecond=0) + timedelta(minutes=15 * rng.randrange(96, 96 * 90))
+    return '''
+        mutation CreateBooking($input: BookingCreateInput!) {
+            createBooking(input: $input, paymentMethod: "cash") {
+                success errors booking { bookingId status }
+            }
+        }
+    ''', {'input': {
+        'serviceId': service_id, 'staffId': rng.choice(staff), 'startDatetime': start.isoformat(),
+        'customerName': customer.username, 'customerEmail': customer.email, 'customerPhone': '0900000000',
+    }}, customer
+
+
+def _add_to_basket(context, rng):
+    return '''
+        mutation AddToBasket($productId: ID!) {
+            addToBasket(productId: $productId, quantity: 1) { success errors }
+        }
+    ''', {'productId': rng.choice(context.product_ids)}, rng.choice(context.customers)
+
+
+def _vnpay_callback(context, rng):
+    return '''
+        mutation VNPayCallback($ref: String!, $hash: String!) {
+            processVnpayCallback(
+                vnpAmount: "10000000", vnpResponseCode: "00", vnpTransactionStatus: "00",
+                vnpTxnRef: $ref, vnpSecureHash: $hash
+            ) { result { success transactionStatus message } }
+        }
+    ''', {'ref': f'{PREFIX}_{rng.randrange(10 ** 9)}', 'hash': '%0128x' % rng.getrandbits(512)}, None
+
+
+OPERATIONS = [
+    BenchmarkOperation('catalogue_listing', 40, _catalogue_listing),
+    BenchmarkOperation('search', 25, _search),
+    BenchmarkOperation('availability', 15, _availability),
+    BenchmarkOperation('add_to_basket', 10, _add_to_basket),
+    BenchmarkOperation('create_booking', 5, _create_booking),
+    BenchmarkOperation('vnpay_callback', 5, _vnpay_callback),
+]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class OperationStats:
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+
+    def summary(self, wall_time):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        milliseconds = lambda value: round(value * 1000, 3) if value is not None else None
+        return {
+            'count': count,
+            'errors': self.errors,
+            'throughput_rps': round(count / wall_time, 2) if wall_time else None,
+            'latency_ms': {
+                'mean': milliseconds(sum(latencies) / count) if count else None,
+                'p50': milliseconds(percentile(latencies, 50)),
+                'p95': milliseconds(percentile(latencies, 95)),
+                'p99': milliseconds(percentile(latencies, 99)),
+                'max': milliseconds(latencies[-1]) if count else None,
+            },
+            'queries': {
+                'mean': round(sum(self.queries) / count, 2) if count else None,
+                'max': max(self.queries) if count else None,
+            },
+        }
+
+
+def run_benchmark(context, operations=None, workers=4, requests=1000, duration=None, seed=0):
+    """
+    Replay a weighted mix of ``operations`` through the schema from
+    ``workers`` threads, until ``requests`` operations ran or ``duration``
+    seconds passed. Each thread uses its own database connection.
+    """
+    from api.schema import schema
+
+    operations = operations or OPERATIONS
+    weights = [operation.weight for operation in operations]
+    stats = {operation.name: OperationStats() for operation in operations}
+    lock = threading.Lock()
+    issued = itertools.count()
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def count_query(execute, sql, params, many, query_context):
+        count_query.local.queries += 1
+        return execute(sql, params, many, query_context)
+    count_query.local = threading.local()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        factory = RequestFactory()
+        try:
+            while True:
+                if requests and next(issued) >= requests:
+                    break
+                if deadline and time.perf_counter() >= deadline:
+                    break
+                operation = rng.choices(operations, weights)[0]
+                query, variables, user = operation.build(context, rng)
+
+                request = factory.post('/graphql/')
+                request.user = user or AnonymousUser()
+                request.loaders = LoaderRegistry()
+                count_query.local.queries = 0
+                start = time.perf_counter()
+                with connection.execute_wrapper(count_query):
+                    result = schema.execute(query, variable_values=variables, context_value=request)
+                elapsed = time.perf_counter() - start
+
+                with lock:
+                    operation_stats = stats[operation.name]
+                    operation_stats.latencies.append(elapsed)
+                    operation_stats.queries.append(count_query.local.queries)
+                    if result.errors:
+                        operation_stats.errors += 1
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(worker, range(workers)))
+
+    wall_time = time.perf_counter() - started
+    total = sum(len(operation_stats.latencies) for operation_stats in stats.values())
+    return {
+        'totals': {
+            'requests': total,
+            'errors': sum(operation_stats.errors for operation_stats in stats.values()),
+            'duration_s': round(wall_time, 3),
+            'throughput_rps': round(total / wall_time, 2) if wall_time else None,
+        },
+        'operations': {name: operation_stats.summary(wall_time) for name, operation_stats in stats.items()},
+    }
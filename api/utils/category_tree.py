@@ -0,0 +1,79 @@
+# api/utils/category_tree.py
+import threading
+from collections import defaultdict
+from types import MappingProxyType
+from django.core.cache import cache
+from oscar.core.loading import get_model
+
+Category = get_model('catalogue', 'Category')
+
+VERSION_CACHE_KEY = 'api:category_tree:version'
+
+
+class CategoryTree:
+    """
+    Immutable snapshot of the public category tree, built from a single
+    query ordered by the treebeard ``path`` column. Nodes are looked up by
+    path, so children and parents resolve without touching the database.
+    """
+    def __init__(self, categories, version):
+        self.version = version
+        steplen = Category.steplen
+        children = defaultdict(list)
+        for category in categories:
+            children[category.path[:-steplen]].append(category)
+        self._by_path = MappingProxyType({category.path: category for category in categories})
+        self._by_slug = MappingProxyType({category.slug: category for category in categories})
+        self._children = MappingProxyType({path: tuple(nodes) for path, nodes in children.items()})
+
+    @classmethod
+    def build(cls, version):
+        return cls(list(Category.objects.filter(is_public=True).order_by('path')), version)
+
+    def children_of(self, category):
+        """Public children of ``category`` in tree order"""
+        return self._children.get(category.path, ())
+
+    def parent_of(self, category):
+        """Public parent of ``category``, or None for roots and hidden parents"""
+        if category.depth <= 1:
+            return None
+        return self._by_path.get(category.path[:-Category.steplen])
+
+    @property
+    def roots(self):
+        return self._children.get('', ())
+
+    def get(self, slug):
+        """Public category by slug, or None"""
+        return self._by_slug.get(slug)
+
+
+_tree = None
+_lock = threading.Lock()
+
+
+def get_category_tree():
+    """
+    Return the current tree, rebuilding it when another process (or a
+    signal in this one) has bumped the shared version stamp.
+    """
+    global _tree
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        if _tree is None or _tree.version != version:
+            _tree = CategoryTree.build(version)
+        return _tree
+
+
+def invalidate_category_tree():
+    global _tree
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        # Key missing (first invalidation or evicted)
+        cache.set(VERSION_CACHE_KEY, 1, None)
+    _tree = None
@@ -0,0 +1,59 @@
+# api/utils/change_log.py
+from django.core.cache import cache
+
+
+class ChangeLog:
+    """
+    Changed primary keys of one model, logged in the shared cache as a
+    sequence number plus one entry per change. In-process indexes remember
+    the sequence number they are current with and replay the entries
+    after it, so every worker sees changes saved by the others. That
+    needs the shared CACHES backend (backend/settings.py): with a
+    per-process cache each worker only replays its own changes (check
+    api.W002).
+    """
+    def __init__(self, name, timeout=60 * 60 * 24, max_replay=1000):
+        self.seq_key = f'api:changes:{name}:seq'
+        self.entry_key = f'api:changes:{name}:{{}}'
+        self.timeout = timeout
+        # More missed changes than this are not replayed
+        self.max_replay = max_replay
+
+    def current(self):
+        return cache.get(self.seq_key, 0)
+
+    def _next_seq(self):
+        try:
+            return cache.incr(self.seq_key)
+        except ValueError:
+            # Key missing (first change or evicted)
+            cache.set(self.seq_key, 1, None)
+            return 1
+
+    def record(self, pk):
+        cache.set(self.entry_key.format(self._next_seq()), pk, self.timeout)
+
+    def invalidate(self):
+        """
+        Make every reader rebuild, e.g. after bulk writes that send no
+        signals: a sequence number without an entry can't be replayed.
+        """
+        self._next_seq()
+
+    def changes(self, since, until):
+        """
+        Set of pks changed after sequence number ``since`` up to ``until``,
+        or None when they can't be replayed (cache flushed, entries
+        expired, too many).
+        """
+        if until < since or until - since > self.max_replay:
+            return None
+        keys = [self.entry_key.format(number) for number in range(since + 1, until + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return None
+        return set(entries.values())
+
+
+product_changes = ChangeLog('product')
+service_changes = ChangeLog('service')
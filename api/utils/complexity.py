@@ -0,0 +1,163 @@
+# api/utils/complexity.py
+from django.conf import settings
+from graphql import (
+    GraphQLError, FieldNode, FragmentSpreadNode, InlineFragmentNode,
+    get_named_type, get_operation_ast, is_list_type, is_non_null_type, is_object_type,
+)
+from graphql.execution.values import get_argument_values, get_variable_values
+
+DEFAULT_QUERY_LIMITS = {
+    'MAX_DEPTH': 10,
+    'MAX_COST': 10000,
+    # Assumed size of list fields without pagination arguments
+    'DEFAULT_LIST_SIZE': 20,
+    # 'Type.field' -> assumed list size, for lists known to be larger
+    'LIST_SIZES': {},
+    # 'Type.field' -> cost of resolving the field once. Defaults to 1 for
+    # object fields and 0 for scalars.
+    'FIELD_COSTS': {},
+}
+
+
+def get_query_limits():
+    limits = dict(DEFAULT_QUERY_LIMITS)
+    limits.update(getattr(settings, 'GRAPHQL_QUERY_LIMITS', {}))
+    return limits
+
+
+def get_max_page_size():
+    return getattr(settings, 'GRAPHQL_MAX_PAGE_SIZE', 100)
+
+
+def clamp_page_size(page_size):
+    """Server-side cap applied to every paginated field"""
+    return min(max(page_size or 1, 1), get_max_page_size())
+
+
+class QueryCostAnalyzer:
+    """
+    Static cost of an operation: each field costs its weight plus its
+    children's cost times the expected list size. Page sizes come from
+    ``pagination`` arguments (variables included), so
+    ``productsPaginated(pagination: {pageSize: 100}) { results { images { id } } }``
+    costs roughly 100 times what a single product costs.
+    """
+    def __init__(self, schema, document, operation_name=None, variables=None, limits=None):
+        self.schema = schema
+        self.document = document
+        self.operation_name = operation_name
+        self.variables = variables or {}
+        self.limits = limits or get_query_limits()
+        self.coerced_variables = {}
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if definition.kind == 'fragment_definition'
+        }
+
+    def analyze(self):
+        """Return (cost, depth), or None when the operation cannot be analyzed"""
+        operation = get_operation_ast(self.document, self.operation_name)
+        if operation is None:
+            return None
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is None:
+            return None
+        coerced = get_variable_values(self.schema, operation.variable_definitions or [], self.variables)
+        if isinstance(coerced, list):
+            # Invalid variables are reported by execution
+            return None
+        self.coerced_variables = coerced
+        return self._selection_set(root_type, operation.selection_set, None, 0)
+
+    def _selection_set(self, parent_type, selection_set, page_size, depth):
+        cost = 0
+        max_depth = depth
+        for node in selection_set.selections:
+            if isinstance(node, FieldNode):
+                node_cost, node_depth = self._field(parent_type, node, page_size, depth + 1)
+            elif isinstance(node, InlineFragmentNode):
+                fragment_type = parent_type
+                if node.type_condition is not None:
+                    fragment_type = self.schema.get_type(node.type_condition.name.value)
+                node_cost, node_depth = self._selection_set(fragment_type, node.selection_set, page_size, depth)
+            elif isinstance(node, FragmentSpreadNode):
+                fragment = self.fragments.get(node.name.value)
+                if fragment is None:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                node_cost, node_depth = self._selection_set(fragment_type, fragment.selection_set, page_size, depth)
+            else:
+                continue
+            cost += node_cost
+            max_depth = max(max_depth, node_depth)
+        return cost, max_depth
+
+    def _field(self, parent_type, node, page_size, depth):
+        name = node.name.value
+        if name.startswith('__') or not is_object_type(parent_type):
+            return 0, depth
+        field = parent_type.fields.get(name)
+        if field is None:
+            return 0, depth
+
+        key = f'{parent_type.name}.{name}'
+        named_type = get_named_type(field.type)
+        weight = self.limits['FIELD_COSTS'].get(key, 1 if is_object_type(named_type) else 0)
+
+        field_type = field.type.of_type if is_non_null_type(field.type) else field.type
+        if is_list_type(field_type):
+            multiplier = page_size or self.limits['LIST_SIZES'].get(key, self.limits['DEFAULT_LIST_SIZE'])
+        else:
+            multiplier = 1
+
+        if node.selection_set is None:
+            return weight, depth
+
+        # A pagination argument sizes the list directly below this field
+        # (e.g. ``results`` on Paginated types)
+        child_page_size = self._page_size(field, node)
+        child_cost, child_depth = self._selection_set(named_type, node.selection_set, child_page_size, depth)
+        return weight + multiplier * child_cost, child_depth
+
+    def _page_size(self, field, node):
+        if 'pagination' not in field.args:
+            return None
+        try:
+            args = get_argument_values(field, node, self.coerced_variables)
+        except GraphQLError:
+            return None
+        pagination = args.get('pagination') or {}
+        return clamp_page_size(pagination.get('page_size', 20))
+
+
+def check_query_limits(schema, document, operation_name=None, variables=None):
+    """
+    Return (report, errors). ``report`` is exposed in the response
+    extensions; ``errors`` is non-empty when the operation is over budget
+    and must not be executed.
+    """
+    limits = get_query_limits()
+    analysis = QueryCostAnalyzer(schema, document, operation_name, variables, limits).analyze()
+    if analysis is None:
+        return None, []
+
+    cost, depth = analysis
+    report = {
+        'requestedQueryCost': cost,
+        'maximumAvailable': limits['MAX_COST'],
+        'depth': depth,
+        'maximumDepth': limits['MAX_DEPTH'],
+    }
+    errors = []
+    if depth > limits['MAX_DEPTH']:
+        errors.append(GraphQLError(
+            f"Query depth {depth} exceeds the maximum depth of {limits['MAX_DEPTH']}",
+            extensions={'code': 'QUERY_TOO_DEEP'},
+        ))
+    if cost > limits['MAX_COST']:
+        errors.append(GraphQLError(
+            f"Query cost {cost} exceeds the maximum cost of {limits['MAX_COST']}",
+            extensions={'code': 'QUERY_TOO_COMPLEX'},
+        ))
+    return report, errors
@@ -0,0 +1,138 @@
+# api/utils/documents.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from graphql import GraphQLError, FieldNode, get_operation_ast, parse, validate
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping"""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+# ✅ Automatic Persisted Queries (APQ)
+APQ_CACHE_KEY = 'api:apq:{}'
+
+class PersistedQueryError(GraphQLError):
+    def __init__(self, message, code):
+        super().__init__(message, extensions={'code': code})
+
+
+def get_persisted_query_hash(extensions):
+    persisted = (extensions or {}).get('persistedQuery')
+    if not isinstance(persisted, dict):
+        return None
+    if persisted.get('version') != 1:
+        raise PersistedQueryError('Unsupported persisted query version', 'PERSISTED_QUERY_NOT_SUPPORTED')
+    return persisted.get('sha256Hash')
+
+
+def resolve_persisted_query(query, extensions):
+    """
+    Return the query text for a request that may carry an APQ hash.
+    A hash with a query registers the document; a hash alone looks it up.
+    """
+    sha256 = get_persisted_query_hash(extensions)
+    if not sha256:
+        return query
+
+    if query:
+        if query_hash(query) != sha256:
+            raise PersistedQueryError('provided sha does not match query', 'INVALID_PERSISTED_QUERY')
+        cache.set(APQ_CACHE_KEY.format(sha256), query, getattr(settings, 'GRAPHQL_APQ_TIMEOUT', None))
+        return query
+
+    query = cache.get(APQ_CACHE_KEY.format(sha256))
+    if query is None:
+        raise PersistedQueryError('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND')
+    return query
+
+
+# ✅ Parsed and validated documents
+_documents = LRUCache(getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 500))
+
+
+def get_document(schema, query):
+    """
+    Return (document, errors) for ``query``. Documents that parse and
+    validate are cached by hash, so repeated operations skip both steps.
+    ``schema`` is the graphql-core schema.
+    """
+    key = query_hash(query)
+    document = _documents.get(key)
+    if document is not None:
+        return document, []
+
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    errors = validate(schema, document)
+    if errors:
+        return document, errors
+
+    _documents.set(key, document)
+    return document, []
+
+
+# ✅ Introspection results
+_introspection_results = LRUCache(32)
+
+
+def is_introspection(document, operation_name):
+    """True when the operation only selects introspection root fields"""
+    operation = get_operation_ast(document, operation_name)
+    if operation is None:
+        return False
+    selections = operation.selection_set.selections
+    return bool(selections) and all(
+        isinstance(node, FieldNode) and node.name.value.startswith('__')
+        for node in selections
+    )
+
+
+def introspection_cache_key(query, variables, operation_name):
+    return (query_hash(query), operation_name, json.dumps(variables or {}, sort_keys=True))
+
+
+def get_cached_introspection(key):
+    return _introspection_results.get(key)
+
+
+def cache_introspection(key, result):
+    if not result.errors:
+        _introspection_results.set(key, result)
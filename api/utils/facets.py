@@ -0,0 +1,162 @@
+# api/utils/facets.py
+import hashlib
+import json
+import re
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from oscar.core.loading import get_model
+from api.utils.category_tree import get_category_tree
+from api.utils.response_cache import get_tag_versions
+
+ProductClass = get_model('catalogue', 'ProductClass')
+ProductCategory = get_model('catalogue', 'ProductCategory')
+
+FACET_CACHE_KEY = 'api:facets:{}'
+# Counts change with products, stock (price) and categories
+FACET_CACHE_TAGS = ('product:*', 'category:*')
+RANGE_PATTERN = re.compile(r'^\[\s*(\S+)\s+TO\s+(\S+)\s*\]$')
+
+
+def get_facet_cache_timeout():
+    return getattr(settings, 'GRAPHQL_FACET_CACHE_TIMEOUT', 60)
+
+
+def parse_range(query):
+    """``'[500000 TO *]'`` -> ``(Decimal('500000'), None)``; bounds are inclusive"""
+    match = RANGE_PATTERN.match(query)
+    if match is None:
+        raise ValueError(f'Unsupported facet query {query!r}')
+    return tuple(None if bound == '*' else Decimal(bound) for bound in match.groups())
+
+
+def _product_class_buckets(filters):
+    return [
+        (str(product_class.pk), product_class.name, Q(product_class_id=product_class.pk))
+        for product_class in ProductClass.objects.order_by('name')
+    ]
+
+
+def _rating_buckets(filters):
+    # "n stars" holds average ratings from n up to (not including) n + 1
+    return [
+        (str(stars), f'{stars}★', Q(rating__gte=stars, rating__lt=stars + 1) if stars < 5 else Q(rating__gte=5))
+        for stars in range(1, 6)
+    ]
+
+
+def _category_buckets(filters):
+    # Drill down: children of the filtered category, else the roots
+    tree = get_category_tree()
+    current = tree.get(filters['category_slug']) if filters.get('category_slug') else None
+    categories = tree.children_of(current) if current is not None else tree.roots
+    # A subquery rather than a join: filter(categories=...) already joined the
+    # product-category table, and a join would also repeat products
+    return [
+        (category.slug, category.name, Q(pk__in=ProductCategory.objects.filter(
+            category_id=category.pk
+        ).values('product_id')))
+        for category in categories
+    ]
+
+
+# OSCAR_SEARCH_FACETS 'fields' -> bucket builder
+FIELD_BUCKETS = {
+    'product_class': _product_class_buckets,
+    'rating': _rating_buckets,
+    'category': _category_buckets,
+}
+
+# OSCAR_SEARCH_FACETS 'queries' field -> queryset field (see annotate_primary_stockrecord)
+QUERY_FIELDS = {'price': 'primary_price'}
+
+
+def normalize_filters(filters):
+    """Filters as a canonical, JSON-serializable dict (enums by value, no Nones)"""
+    normalized = {}
+    for key, value in (filters or {}).items():
+        value = getattr(value, 'value', value)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is not None and value != '':
+            normalized[key] = value
+    return normalized
+
+
+def compute_facets(queryset, filters=None, config=None):
+    """
+    Count every bucket of OSCAR_SEARCH_FACETS over ``queryset`` in one
+    aggregate query, one ``COUNT(...) FILTER (WHERE ...)`` per bucket.
+    """
+    filters = filters or {}
+    if config is None:
+        config = getattr(settings, 'OSCAR_SEARCH_FACETS', {})
+
+    facets = []
+    conditions = {}
+    for key, facet in config.get('fields', {}).items():
+        build = FIELD_BUCKETS.get(facet.get('field'))
+        if build is None:
+            continue
+        buckets = []
+        for value, label, condition in build(filters):
+            alias = f'bucket_{len(conditions)}'
+            conditions[alias] = condition
+            buckets.append((value, label, alias))
+        facets.append((key, facet.get('name', key), buckets))
+
+    for key, facet in config.get('queries', {}).items():
+        field = QUERY_FIELDS.get(facet.get('field'))
+        if field is None:
+            continue
+        buckets = []
+        for label, query in facet.get('queries', []):
+            low, high = parse_range(query)
+            condition = Q()
+            if low is not None:
+                condition &= Q(**{f'{field}__gte': low})
+            if high is not None:
+                condition &= Q(**{f'{field}__lte': high})
+            alias = f'bucket_{len(conditions)}'
+            conditions[alias] = condition
+            buckets.append((query, label, alias))
+        facets.append((key, facet.get('name', key), buckets))
+
+    counts = queryset.order_by().aggregate(**{
+        alias: Count('pk', filter=condition) for alias, condition in conditions.items()
+    }) if conditions else {}
+
+    return [
+        {
+            'key': key,
+            'name': name,
+            'buckets': [
+                {'value': value, 'label': label, 'count': counts[alias]}
+                for value, label, alias in buckets
+            ],
+        }
+        for key, name, buckets in facets
+    ]
+
+
+def get_product_facets(queryset, filters=None):
+    """
+    compute_facets() cached per normalized filter combination for
+    GRAPHQL_FACET_CACHE_TIMEOUT seconds. The key includes the response
+    cache's product and category tag versions, so model signals
+    invalidate it as well.
+    """
+    normalized = normalize_filters(filters)
+    timeout = get_facet_cache_timeout()
+    if not timeout:
+        return compute_facets(queryset, normalized)
+
+    key = FACET_CACHE_KEY.format(hashlib.sha256(json.dumps(
+        [normalized, get_tag_versions(FACET_CACHE_TAGS)], sort_keys=True, default=str
+    ).encode()).hexdigest())
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset, normalized)
+        cache.set(key, facets, timeout)
+    return facets
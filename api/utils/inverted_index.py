@@ -0,0 +1,307 @@
+# api/utils/inverted_index.py
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter
+from django.conf import settings
+from django.utils.html import strip_tags
+from oscar.core.loading import get_model
+from text_unidecode import unidecode
+from api.utils.change_log import product_changes
+
+Product = get_model('catalogue', 'Product')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+# Term frequency multiplier per field
+FIELD_WEIGHTS = {'title': 3, 'description': 1}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+FILE_MAGIC = b'PIDX1\n'
+HEADER = struct.Struct('<Q')
+
+# remove() compacts once this many tombstones make up a quarter of the index
+COMPACT_MIN_DELETED = 1000
+
+
+def fold(text):
+    """Lowercase ASCII transliteration: "Điều hòa" -> "dieu hoa" """
+    return unidecode(text or '').lower()
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class InvertedIndex:
+    """
+    BM25-ranked inverted index. Each term's posting list is a pair of
+    ``array('I')``: internal document numbers (ascending) and weighted term
+    frequencies. Replacing or removing a document tombstones its number;
+    tombstones are dropped by compact().
+
+    Posting lists of an index loaded with load() are memoryviews over the
+    mapped file until a change to the term copies them.
+    """
+    def __init__(self, seq=0):
+        self.seq = seq
+        self.terms = {}
+        self.doc_pks = array('q')      # document number -> pk, -1 once removed
+        self.doc_lengths = array('I')
+        self.docnos = {}               # pk -> document number
+        self.total_length = 0
+        self.deleted = 0
+        self._lock = threading.RLock()
+        self._mmap = None
+
+    def __len__(self):
+        return len(self.docnos)
+
+    def add(self, pk, fields):
+        """Index (or re-index) document ``pk`` from {field name: text}"""
+        frequencies = Counter()
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1)
+            for token in tokenize(text):
+                frequencies[token] += weight
+        with self._lock:
+            self._remove(pk)
+            docno = len(self.doc_pks)
+            length = sum(frequencies.values())
+            self.doc_pks.append(pk)
+            self.doc_lengths.append(length)
+            self.docnos[pk] = docno
+            self.total_length += length
+            for term, frequency in frequencies.items():
+                docs, freqs = self._writable_postings(term)
+                docs.append(docno)
+                freqs.append(frequency)
+
+    def remove(self, pk):
+        with self._lock:
+            removed = self._remove(pk)
+            if self.deleted > COMPACT_MIN_DELETED and self.deleted * 4 > len(self.doc_pks):
+                self.compact()
+            return removed
+
+    def _remove(self, pk):
+        docno = self.docnos.pop(pk, None)
+        if docno is None:
+            return False
+        self.total_length -= self.doc_lengths[docno]
+        self.doc_pks[docno] = -1
+        self.doc_lengths[docno] = 0
+        self.deleted += 1
+        return True
+
+    def _writable_postings(self, term):
+        postings = self.terms.get(term)
+        if postings is None:
+            postings = self.terms[term] = (array('I'), array('I'))
+        elif not isinstance(postings[0], array):
+            # Copy-on-write of a posting list mapped from the index file
+            postings = self.terms[term] = (array('I', postings[0]), array('I', postings[1]))
+        return postings
+
+    def compact(self):
+        """Renumber the live documents and drop tombstones from the postings"""
+        with self._lock:
+            renumber = {}
+            doc_pks, doc_lengths = array('q'), array('I')
+            for docno, pk in enumerate(self.doc_pks):
+                if pk >= 0:
+                    renumber[docno] = len(doc_pks)
+                    doc_pks.append(pk)
+                    doc_lengths.append(self.doc_lengths[docno])
+            terms = {}
+            for term, (docs, freqs) in self.terms.items():
+                new_docs, new_freqs = array('I'), array('I')
+                for docno, frequency in zip(docs, freqs):
+                    if docno in renumber:
+                        new_docs.append(renumber[docno])
+                        new_freqs.append(frequency)
+                if new_docs:
+                    terms[term] = (new_docs, new_freqs)
+            self.terms = terms
+            self.doc_pks, self.doc_lengths = doc_pks, doc_lengths
+            self.docnos = {pk: docno for docno, pk in enumerate(doc_pks)}
+            self.deleted = 0
+            self._mmap = None
+
+    def search(self, query, limit=None):
+        """[(pk, score)] of documents matching any term of ``query``, best first"""
+        with self._lock:
+            count = len(self.docnos)
+            if not count:
+                return []
+            average_length = self.total_length / count or 1
+            doc_pks, doc_lengths = self.doc_pks, self.doc_lengths
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self.terms.get(term)
+                if postings is None:
+                    continue
+                if self.deleted:
+                    live = [(docno, frequency) for docno, frequency in zip(*postings) if doc_pks[docno] >= 0]
+                else:
+                    live = list(zip(*postings))
+                idf = math.log(1 + (count - len(live) + 0.5) / (len(live) + 0.5))
+                scale = BM25_K1 * BM25_B / average_length
+                base = BM25_K1 * (1 - BM25_B)
+                for docno, frequency in live:
+                    score = idf * frequency * (BM25_K1 + 1) / (frequency + base + scale * doc_lengths[docno])
+                    scores[docno] = scores.get(docno, 0.0) + score
+            if limit is None:
+                best = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            else:
+                best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(doc_pks[docno], score) for docno, score in best]
+
+    # ✅ Persistence: header, then 8-byte aligned arrays the loader maps
+    def save(self, path):
+        """Write the (compacted) index atomically to ``path``"""
+        with self._lock:
+            if self.deleted:
+                self.compact()
+            terms = []
+            sections = [self.doc_pks.tobytes(), self.doc_lengths.tobytes()]
+            for term, (docs, freqs) in self.terms.items():
+                terms.append((term, len(docs)))
+                sections += [docs.tobytes(), freqs.tobytes()]
+            header = json.dumps({
+                'byteorder': sys.byteorder,
+                'seq': self.seq,
+                'docs': len(self.doc_pks),
+                'total_length': self.total_length,
+                'terms': terms,
+            }).encode()
+
+        tmp_path = f'{path}.tmp'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            offset = f.write(FILE_MAGIC + HEADER.pack(len(header)) + header)
+            for section in sections:
+                padding = _align(offset) - offset
+                offset += f.write(b'\0' * padding) + f.write(section)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Map an index written by save(); posting lists are not copied"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError(f'{path} is not a product index file')
+        offset = len(FILE_MAGIC)
+        (header_length,) = HEADER.unpack_from(mapped, offset)
+        offset += HEADER.size
+        header = json.loads(mapped[offset:offset + header_length])
+        offset += header_length
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was written on a {header["byteorder"]}-endian machine')
+
+        view = memoryview(mapped)
+
+        def section(typecode, length):
+            nonlocal offset
+            offset = _align(offset)
+            size = array(typecode).itemsize * length
+            data = view[offset:offset + size].cast(typecode)
+            offset += size
+            return data
+
+        index = cls(seq=header['seq'])
+        count = header['docs']
+        index.doc_pks = array('q', section('q', count))
+        index.doc_lengths = array('I', section('I', count))
+        index.docnos = {pk: docno for docno, pk in enumerate(index.doc_pks)}
+        index.total_length = header['total_length']
+        for term, length in header['terms']:
+            index.terms[term] = (section('I', length), section('I', length))
+        index._mmap = mapped
+        return index
+
+
+# ✅ The catalogue index
+def product_fields(title, description):
+    return {'title': title, 'description': strip_tags(description or '')}
+
+
+def index_products(index, pks=None, batch_size=2000):
+    """(Re-)index the given products, or every product; missing pks are removed"""
+    queryset = Product.objects.order_by('pk').values_list('pk', 'title', 'description')
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    seen = set()
+    for pk, title, description in queryset.iterator(chunk_size=batch_size):
+        index.add(pk, product_fields(title, description))
+        seen.add(pk)
+    for pk in set(pks or ()) - seen:
+        index.remove(pk)
+    return len(seen)
+
+
+def build_product_index(batch_size=2000):
+    # Read the sequence first: changes made during the build are replayed
+    index = InvertedIndex(seq=product_changes.current())
+    index_products(index, batch_size=batch_size)
+    return index
+
+
+def get_index_path():
+    return getattr(settings, 'PRODUCT_INDEX_PATH', None)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def _load_product_index():
+    path = get_index_path()
+    if path and os.path.exists(path):
+        try:
+            return InvertedIndex.load(path)
+        except (OSError, ValueError):
+            pass
+    return build_product_index()
+
+
+def _catch_up(index, seq):
+    """Replay the logged changes after ``index.seq``; None when a rebuild is needed"""
+    pks = product_changes.changes(index.seq, seq)
+    if pks is None:
+        return None
+    index_products(index, pks=pks)
+    index.seq = seq
+    return index
+
+
+def get_product_index():
+    """
+    Return this process's product index: mapped from PRODUCT_INDEX_PATH or
+    built from the catalogue on first use, then kept current with the
+    changes other processes (and signals in this one) have logged.
+    """
+    global _index
+    seq = product_changes.current()
+    index = _index
+    if index is not None and index.seq == seq:
+        return index
+    with _lock:
+        if _index is None:
+            _index = _load_product_index()
+        if _index.seq != seq:
+            _index = _catch_up(_index, seq) or build_product_index()
+        return _index
+
@@ -0,0 +1,93 @@
+# api/utils/json_encoding.py
+import json
+import time
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class StandardJSONEncoder:
+    """
+    ``json.dumps`` with graphene-django's separators. Decimal, datetime and
+    UUID go through DjangoJSONEncoder.default.
+    """
+    def encode(self, data, pretty=False):
+        if pretty:
+            content = json.dumps(data, sort_keys=True, indent=2, separators=(',', ': '), cls=DjangoJSONEncoder)
+        else:
+            content = json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder)
+        return content.encode()
+
+
+def _orjson_default(value):
+    # orjson handles datetime, date, time and UUID natively
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class OrjsonEncoder:
+    """
+    orjson: serializes in C straight to UTF-8 bytes. Values orjson rejects
+    (integers over 64 bits, non-string keys) fall back to StandardJSONEncoder.
+    """
+    fallback = StandardJSONEncoder()
+
+    def __init__(self):
+        if orjson is None:
+            raise ImproperlyConfigured('OrjsonEncoder requires the orjson package')
+
+    def encode(self, data, pretty=False):
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if pretty else 0
+        try:
+            return orjson.dumps(data, default=_orjson_default, option=option)
+        except orjson.JSONEncodeError:
+            return self.fallback.encode(data, pretty)
+
+
+DEFAULT_ENCODER = (
+    'api.utils.json_encoding.OrjsonEncoder' if orjson is not None
+    else 'api.utils.json_encoding.StandardJSONEncoder'
+)
+
+_encoders = {}
+
+
+def get_response_encoder():
+    """The encoder named by GRAPHQL_JSON_ENCODER, instantiated once"""
+    path = getattr(settings, 'GRAPHQL_JSON_ENCODER', None) or DEFAULT_ENCODER
+    encoder = _encoders.get(path)
+    if encoder is None:
+        encoder = _encoders[path] = import_string(path)()
+    return encoder
+
+
+def encode_response(data, pretty=False):
+    return get_response_encoder().encode(data, pretty)
+
+
+def compare_encoders(data, encoders, rounds=50):
+    """
+    Encode ``data`` ``rounds`` times with every encoder. Returns
+    ``{name: {'mean_ms', 'min_ms', 'bytes'}}``.
+    """
+    results = {}
+    for name, encoder in encoders.items():
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            content = encoder.encode(data)
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            'mean_ms': sum(timings) / len(timings) * 1000,
+            'min_ms': min(timings) * 1000,
+            'bytes': len(content),
+        }
+    return results
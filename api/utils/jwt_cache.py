@@ -0,0 +1,119 @@
+# api/utils/jwt_cache.py
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from graphql_jwt.backends import JSONWebTokenBackend
+from graphql_jwt.utils import get_credentials, get_payload, get_user_by_payload
+
+# Never kept in the snapshot; loaded from the database if something reads it
+EXCLUDED_FIELDS = ('password',)
+
+
+def get_cache_timeout():
+    return getattr(settings, 'GRAPHQL_JWT_USER_CACHE_TIMEOUT', 60)
+
+
+class TokenUserCache:
+    """
+    Per-process LRU from token signature to a snapshot of the user's field
+    values, each entry valid until the TTL or the token's ``exp``, whichever
+    is first.
+    """
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or getattr(settings, 'GRAPHQL_JWT_USER_CACHE_SIZE', 10000)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        key = token.rsplit('.', 1)[-1]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            cached_token, expires, user_id, values = entry
+            if expires <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        if not hmac.compare_digest(cached_token, token):
+            return None
+        return values
+
+    def set(self, token, expires, user_id, values):
+        key = token.rsplit('.', 1)[-1]
+        with self._lock:
+            self._data[key] = (token, expires, user_id, values)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._data.items() if entry[2] == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_user_cache = TokenUserCache()
+
+
+def snapshot_user(user):
+    User = type(user)
+    return [
+        (field.attname, getattr(user, field.attname))
+        for field in User._meta.concrete_fields
+        if field.attname not in EXCLUDED_FIELDS
+    ]
+
+
+def restore_user(values):
+    """
+    A fresh User per request from the snapshot. Excluded fields are deferred,
+    so ``save()`` only writes the snapshot fields.
+    """
+    User = get_user_model()
+    names, field_values = zip(*values)
+    return User.from_db(DEFAULT_DB_ALIAS, names, field_values)
+
+
+def get_user_by_token(token, context=None):
+    """graphql_jwt.shortcuts.get_user_by_token, answered from the cache when possible"""
+    timeout = get_cache_timeout()
+    if timeout:
+        values = token_user_cache.get(token)
+        if values is not None:
+            return restore_user(values)
+
+    payload = get_payload(token, context)
+    user = get_user_by_payload(payload)
+    if user is not None and timeout:
+        expires = min(time.time() + timeout, payload.get('exp') or float('inf'))
+        token_user_cache.set(token, expires, user.pk, snapshot_user(user))
+    return user
+
+
+class CachedJSONWebTokenBackend(JSONWebTokenBackend):
+    """
+    JSONWebTokenBackend that skips decoding the token and loading the user
+    for tokens seen in the last GRAPHQL_JWT_USER_CACHE_TIMEOUT seconds.
+    Entries are dropped when the user is saved or deleted (api/signals.py);
+    changes that bypass signals, or are made in other processes, show up
+    after the timeout.
+    """
+    def authenticate(self, request=None, **kwargs):
+        if request is None or getattr(request, "_jwt_token_auth", False):
+            return None
+
+        token = get_credentials(request, **kwargs)
+
+        if token is not None:
+            return get_user_by_token(token, request)
+
+        return None
@@ -0,0 +1,182 @@
+# api/utils/metrics.py
+import threading
+import time
+from contextvars import ContextVar
+from inspect import isawaitable
+from django.conf import settings
+from django.db.models import Manager, QuerySet
+from graphql import get_named_type, is_leaf_type
+from api.utils.async_execution import is_default_resolver
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram for one label set"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class HistogramFamily:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for values, histogram in sorted(self.series.items()):
+            labels = ','.join(
+                f'{name}="{escape_label(value)}"' for name, value in zip(self.labels, values)
+            )
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{self.name}_sum{{{labels}}} {histogram.sum}')
+            lines.append(f'{self.name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class ResolverMetrics:
+    """
+    Per-process resolver histograms, labelled by operation name and field
+    (``Type.field``, so aliases and list indices do not add series).
+    """
+    def __init__(self, max_operations=None):
+        self.max_operations = max_operations or getattr(settings, 'GRAPHQL_METRICS_MAX_OPERATIONS', 200)
+        self.operations = set()
+        self._lock = threading.Lock()
+        labels = ('operation', 'field')
+        self.duration = HistogramFamily(
+            'graphql_resolver_duration_seconds', 'Wall time spent in GraphQL resolvers.',
+            labels, DURATION_BUCKETS,
+        )
+        self.sql_queries = HistogramFamily(
+            'graphql_resolver_sql_queries', 'SQL queries run by GraphQL resolvers.',
+            labels, QUERY_COUNT_BUCKETS,
+        )
+        self.sql_duration = HistogramFamily(
+            'graphql_resolver_sql_duration_seconds', 'Time GraphQL resolvers spent in SQL queries.',
+            labels, DURATION_BUCKETS,
+        )
+
+    def observe(self, operation, field, duration, timing):
+        with self._lock:
+            # Operation names come from clients; cap how many get their own series
+            if operation not in self.operations:
+                if len(self.operations) >= self.max_operations:
+                    operation = 'other'
+                else:
+                    self.operations.add(operation)
+            key = (operation, field)
+            for family, value in (
+                (self.duration, duration),
+                (self.sql_queries, timing.queries),
+                (self.sql_duration, timing.sql_time),
+            ):
+                histogram = family.series.get(key)
+                if histogram is None:
+                    histogram = family.series[key] = Histogram(family.buckets)
+                histogram.observe(value)
+
+    def render(self):
+        with self._lock:
+            families = (self.duration, self.sql_queries, self.sql_duration)
+            return '\n'.join(family.render() for family in families) + '\n'
+
+
+resolver_metrics = ResolverMetrics()
+
+
+class FieldTiming:
+    __slots__ = ('queries', 'sql_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+
+
+# The field being resolved; context variables follow sync_to_async into
+# its worker thread, so queries are attributed in the async view as well
+_current_field = ContextVar('graphql_current_field', default=None)
+
+
+def record_sql(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection (see api/signals.py)"""
+    timing = _current_field.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.queries += 1
+        timing.sql_time += time.perf_counter() - start
+
+
+def operation_label(info):
+    operation = info.operation
+    return operation.name.value if operation.name else 'anonymous'
+
+
+class ResolverMetricsMiddleware:
+    """
+    Records wall time and SQL queries of every resolver except plain
+    scalar attribute reads. Time spent resolving child fields is not
+    included; each field is recorded on its own.
+    """
+    def resolve(self, next, root, info, **kwargs):
+        field = info.parent_type.fields[info.field_name]
+        if is_default_resolver(field.resolve) and is_leaf_type(get_named_type(info.return_type)):
+            return next(root, info, **kwargs)
+
+        timing = FieldTiming()
+        start = time.perf_counter()
+        token = _current_field.set(timing)
+        try:
+            result = next(root, info, **kwargs)
+            if isawaitable(result):
+                return self.resolve_async(result, info, timing, start)
+            # Evaluate lazy querysets here so their query counts for this field
+            if isinstance(result, Manager):
+                result = result.all()
+            if isinstance(result, QuerySet):
+                result = list(result)
+        finally:
+            _current_field.reset(token)
+        self.observe(info, timing, start)
+        return result
+
+    async def resolve_async(self, awaitable, info, timing, start):
+        token = _current_field.set(timing)
+        try:
+            return await awaitable
+        finally:
+            _current_field.reset(token)
+            self.observe(info, timing, start)
+
+    @staticmethod
+    def observe(info, timing, start):
+        resolver_metrics.observe(
+            operation_label(info),
+            f'{info.parent_type.name}.{info.field_name}',
+            time.perf_counter() - start,
+            timing,
+        )
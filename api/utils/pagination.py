@@ -1,6 +1,18 @@
+import base64
+import datetime
+import json
+import math
 import graphene
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
 from graphene import relay
 from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from api.utils.planner import get_selection
+from api.utils.complexity import clamp_page_size
 
 # ✅ PageInfoType tự định nghĩa
 class PageInfoType(graphene.ObjectType):
@@ -11,6 +23,7 @@ class PageInfoType(graphene.ObjectType):
     current_page = graphene.Int()
     total_pages = graphene.Int()
     total_count = graphene.Int()
+    total_count_is_estimate = graphene.Boolean()
     page_size = graphene.Int()
 
 # ✅ Kết nối có tổng số phần tử
@@ -34,40 +47,267 @@ class ExtendedConnection(CountableConnection):
 class PaginationInput(graphene.InputObjectType):
     page = graphene.Int(default_value=1)
     page_size = graphene.Int(default_value=20)
+    # Keyset (cursor) mode: used when use_cursor is set or a cursor is given
+    use_cursor = graphene.Boolean(default_value=False)
+    after = graphene.String()
+    before = graphene.String()
+    # Allow planner row estimates for totalCount on large PostgreSQL tables
+    estimate_count = graphene.Boolean(default_value=False)
 
 class SortInput(graphene.InputObjectType):
     field = graphene.String(required=True)
     direction = graphene.Enum('SortDirection', [('ASC', 'asc'), ('DESC', 'desc')])()
 
 # ✅ Hàm tạo dynamic Paginated Type
-def create_paginated_type(object_type, name):
+def create_paginated_type(object_type, name, extra_fields=None):
     meta_class = type("Meta", (), {"name": f"Paginated{name}"})
 
     fields = {
         "Meta": meta_class,
         "results": graphene.List(object_type),
         "page_info": graphene.Field(graphene.NonNull(PageInfoType)),  # ✅ dùng class đã định nghĩa
+        **(extra_fields or {}),
     }
 
     return type(f"Paginated{name}", (graphene.ObjectType,), fields)
 
 # ✅ Hàm phân trang queryset
-def paginate_queryset(queryset, page=1, page_size=20):
-    from django.core.paginator import Paginator
+def paginate_queryset(queryset, page=1, page_size=20, with_count=True, estimate=False):
+    """
+    Page-number pagination. Without ``with_count`` no COUNT query runs and
+    one extra row is fetched to tell whether a next page exists.
+    """
+    if with_count and not estimate:
+        from django.core.paginator import Paginator
 
-    paginator = Paginator(queryset, page_size)
-    page_obj = paginator.get_page(page)
+        paginator = Paginator(queryset, page_size)
+        page_obj = paginator.get_page(page)
+
+        return {
+            'results': page_obj.object_list,
+            'page_info': {
+                'has_next_page': page_obj.has_next(),
+                'has_previous_page': page_obj.has_previous(),
+                'current_page': page_obj.number,
+                'total_pages': paginator.num_pages,
+                'total_count': paginator.count,
+                'total_count_is_estimate': False,
+                'page_size': page_size,
+                'start_cursor': f"cursor:{(page - 1) * page_size}",
+                'end_cursor': f"cursor:{page * page_size - 1}",
+            }
+        }
+
+    total_count, is_estimate = estimate_count(queryset) if with_count else (None, None)
+    page = max(page or 1, 1)
+    offset = (page - 1) * page_size
+    results = list(queryset[offset:offset + page_size + 1])
+    has_next = len(results) > page_size
+
+    return {
+        'results': results[:page_size],
+        'page_info': {
+            'has_next_page': has_next,
+            'has_previous_page': page > 1,
+            'current_page': page,
+            'total_pages': _total_pages(total_count, page_size),
+            'total_count': total_count,
+            'total_count_is_estimate': is_estimate,
+            'page_size': page_size,
+            'start_cursor': f"cursor:{offset}",
+            'end_cursor': f"cursor:{offset + page_size - 1}",
+        }
+    }
+
+def _total_pages(total_count, page_size):
+    if total_count is None:
+        return None
+    return max(math.ceil(total_count / page_size), 1)
+
+# ✅ Đếm tổng số bản ghi (ước lượng trên PostgreSQL)
+def estimate_count(queryset):
+    """
+    Return (count, is_estimate). On PostgreSQL, use the planner's row
+    estimate (pg_class.reltuples for unfiltered tables, EXPLAIN otherwise)
+    when it is at least GRAPHQL_COUNT_ESTIMATE_THRESHOLD. Smaller results
+    and other backends get an exact COUNT.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count(), False
+
+    threshold = getattr(settings, 'GRAPHQL_COUNT_ESTIMATE_THRESHOLD', 100000)
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+
+    # reltuples is -1 for tables that were never analyzed
+    if estimate < threshold:
+        return queryset.count(), False
+    return int(estimate), True
+
+def count_requested(info):
+    """True when the client selected pageInfo.totalCount or totalPages"""
+    page_info = get_selection(info).get('page_info', {})
+    return 'total_count' in page_info or 'total_pages' in page_info
+
+# ✅ Chọn chế độ phân trang theo PaginationInput
+def paginate(queryset, pagination=None, default_page_size=20, info=None):
+    """
+    Paginate by page number, or by keyset when the client asks for cursors.
+    With ``info``, the total is only counted if the client selected it.
+    """
+    pagination = pagination or {}
+    page_size = clamp_page_size(pagination.get('page_size', default_page_size))
+    with_count = info is None or count_requested(info)
+    estimate = pagination.get('estimate_count', False)
+    after = pagination.get('after')
+    before = pagination.get('before')
+    if pagination.get('use_cursor') or after or before:
+        return paginate_keyset(
+            queryset, page_size, after=after, before=before,
+            with_count=with_count, estimate=estimate
+        )
+    return paginate_queryset(
+        queryset, pagination.get('page', 1), page_size,
+        with_count=with_count, estimate=estimate
+    )
+
+# ✅ Phân trang keyset (cursor)
+KEYSET_ALIAS = 'keyset_{}'
+
+def _keyset_ordering(queryset):
+    """
+    Return [(expression, descending)] for the queryset's ordering, with the
+    primary key appended as a unique tie-breaker.
+    """
+    ordering = queryset.query.order_by
+    if not ordering and queryset.query.default_ordering:
+        ordering = queryset.model._meta.ordering
+
+    keys = []
+    for item in ordering:
+        if isinstance(item, OrderBy):
+            keys.append((item.expression, item.descending))
+        elif isinstance(item, str) and item != '?':
+            keys.append((F(item.lstrip('-')), item.startswith('-')))
+        else:
+            raise GraphQLError(f"Ordering {item!r} does not support cursor pagination")
+
+    if not any(isinstance(expression, F) and expression.name in ('pk', 'id') for expression, _ in keys):
+        keys.append((F('pk'), False))
+    return keys
+
+def _order_expressions(count, descending_flags):
+    # NULLs sort last ascending and first descending (the PostgreSQL
+    # default), made explicit so every backend agrees with _after_q()
+    return [
+        F(KEYSET_ALIAS.format(i)).desc(nulls_first=True) if descending
+        else F(KEYSET_ALIAS.format(i)).asc(nulls_last=True)
+        for i, descending in zip(range(count), descending_flags)
+    ]
+
+def _after_q(values, descending_flags):
+    """Q matching rows that sort strictly after ``values``"""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for i, (value, descending) in enumerate(zip(values, descending_flags)):
+        alias = KEYSET_ALIAS.format(i)
+        if value is None:
+            after = Q(**{f'{alias}__isnull': False}) if descending else Q(pk__in=[])
+            same = Q(**{f'{alias}__isnull': True})
+        else:
+            lookup = 'lt' if descending else 'gt'
+            after = Q(**{f'{alias}__{lookup}': value})
+            if not descending:
+                after |= Q(**{f'{alias}__isnull': True})
+            same = Q(**{alias: value})
+        condition |= equal & after
+        equal &= same
+    return condition
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder drops microseconds, which would make cursors skip rows
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise GraphQLError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise GraphQLError("Invalid cursor")
+    return values
+
+def paginate_keyset(queryset, page_size=20, after=None, before=None, with_count=False, estimate=False):
+    """
+    Keyset pagination. Cursors are opaque and encode the sort key values
+    plus the primary key of a row, so every page is an index range scan
+    instead of an OFFSET. The total is only counted with ``with_count``.
+    """
+    if with_count:
+        total_count, is_estimate = estimate_count(queryset) if estimate else (queryset.count(), False)
+    else:
+        total_count, is_estimate = None, None
+
+    keys = _keyset_ordering(queryset)
+    descending_flags = [descending for _, descending in keys]
+    queryset = queryset.annotate(**{
+        KEYSET_ALIAS.format(i): expression for i, (expression, _) in enumerate(keys)
+    })
+
+    backwards = bool(before) and not after
+    if backwards:
+        descending_flags = [not descending for descending in descending_flags]
+        cursor = before
+    else:
+        cursor = after
+
+    queryset = queryset.order_by(*_order_expressions(len(keys), descending_flags))
+    if cursor:
+        queryset = queryset.filter(_after_q(decode_cursor(cursor, len(keys)), descending_flags))
+
+    results = list(queryset[:page_size + 1])
+    has_more = len(results) > page_size
+    results = results[:page_size]
+    if backwards:
+        results.reverse()
+
+    cursors = [
+        encode_cursor([getattr(obj, KEYSET_ALIAS.format(i)) for i in range(len(keys))])
+        for obj in (results[:1] + results[-1:] if results else [])
+    ]
 
     return {
-        'results': page_obj.object_list,
+        'results': results,
         'page_info': {
-            'has_next_page': page_obj.has_next(),
-            'has_previous_page': page_obj.has_previous(),
-            'current_page': page_obj.number,
-            'total_pages': paginator.num_pages,
-            'total_count': paginator.count,
+            'has_next_page': True if backwards else has_more,
+            'has_previous_page': has_more if backwards else bool(cursor),
+            'current_page': None,
+            'total_pages': _total_pages(total_count, page_size),
+            'total_count': total_count,
+            'total_count_is_estimate': is_estimate,
             'page_size': page_size,
-            'start_cursor': f"cursor:{(page - 1) * page_size}",
-            'end_cursor': f"cursor:{page * page_size - 1}",
+            'start_cursor': cursors[0] if cursors else None,
+            'end_cursor': cursors[-1] if cursors else None,
         }
     }
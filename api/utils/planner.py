@@ -0,0 +1,125 @@
+# api/utils/planner.py
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+class FieldPlan:
+    """
+    Describes what a GraphQL field needs from the database when it does not
+    map 1:1 onto a model field.
+
+    only: extra columns the resolver reads
+    select_related: FK paths the resolver follows
+    prefetch: (lookup, queryset_factory, to_attr) for a filtered Prefetch
+    """
+    def __init__(self, only=(), select_related=(), prefetch=None):
+        self.only = tuple(only)
+        self.select_related = tuple(select_related)
+        self.prefetch = prefetch
+
+
+# model -> {snake_case graphql field name: FieldPlan}
+_field_plans = {}
+
+
+def register_field_plans(model, plans):
+    """Declare FieldPlans for the custom fields of the type that exposes ``model``"""
+    _field_plans.setdefault(model, {}).update(plans)
+
+
+def get_selection(info):
+    """
+    Return the fields selected under the field being resolved as a nested
+    dict of snake_case names, with fragments merged in.
+    """
+    selection = {}
+    for field_node in info.field_nodes:
+        _collect_fields(field_node.selection_set, info.fragments, selection)
+    return selection
+
+
+def _collect_fields(selection_set, fragments, into):
+    if selection_set is None:
+        return
+    for node in selection_set.selections:
+        if isinstance(node, FieldNode):
+            name = node.name.value
+            if name.startswith('__'):
+                continue
+            _collect_fields(node.selection_set, fragments, into.setdefault(to_snake_case(name), {}))
+        elif isinstance(node, FragmentSpreadNode):
+            fragment = fragments.get(node.name.value)
+            if fragment is not None:
+                _collect_fields(fragment.selection_set, fragments, into)
+        elif isinstance(node, InlineFragmentNode):
+            _collect_fields(node.selection_set, fragments, into)
+
+
+class QueryPlan:
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch = {}
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch.values())
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def plan_queryset(queryset, info, path=('results',)):
+    """
+    Apply select_related, prefetch_related and only() to ``queryset`` based on
+    the fields the client selected. ``path`` leads from the resolved field to
+    the list of objects, e.g. ``results`` on paginated types.
+    """
+    selection = get_selection(info)
+    for name in path:
+        selection = selection.get(name)
+        if selection is None:
+            # Objects are not requested at all (e.g. only pageInfo)
+            return queryset
+    plan = QueryPlan()
+    _plan_model(queryset.model, selection, '', plan)
+    return plan.apply(queryset)
+
+
+def _plan_model(model, selection, prefix, plan):
+    plans = _field_plans.get(model, {})
+    plan.only.add(prefix + model._meta.pk.name)
+
+    for name, subselection in selection.items():
+        field_plan = plans.get(name)
+        if field_plan is not None:
+            plan.only.update(prefix + column for column in field_plan.only)
+            plan.select_related.update(prefix + path for path in field_plan.select_related)
+            if field_plan.prefetch:
+                lookup, queryset_factory, to_attr = field_plan.prefetch
+                plan.prefetch[prefix + lookup] = Prefetch(
+                    prefix + lookup, queryset=queryset_factory(), to_attr=to_attr
+                )
+            continue
+
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+
+        if field.is_relation and (field.many_to_one or field.one_to_one) and field.concrete:
+            plan.only.add(prefix + name)
+            if subselection:
+                plan.select_related.add(prefix + name)
+                _plan_model(field.related_model, subselection, f'{prefix}{name}__', plan)
+        elif field.is_relation:
+            # Many-valued relations are fetched in a separate query and do not
+            # take part in only()
+            if prefix + name not in plan.prefetch:
+                plan.prefetch[prefix + name] = prefix + name
+        elif field.concrete:
+            plan.only.add(prefix + name)
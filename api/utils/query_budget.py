@@ -0,0 +1,280 @@
+# api/utils/query_budget.py
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.db.models import Manager, QuerySet
+from django.test import RequestFactory
+from django.utils import timezone
+from oscar.core.loading import get_model
+from api.loaders.registry import LoaderRegistry
+
+OUTSIDE_RESOLVERS = '(outside resolvers)'
+
+
+class OperationBudget:
+    """
+    A representative operation and the most SQL queries and result rows
+    (objects in the response data) it may take. ``viewer`` is None,
+    'customer' or 'staff'.
+    """
+    def __init__(self, name, query, max_queries, max_rows, variables=None, viewer=None):
+        self.name = name
+        self.query = query
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self.variables = variables or {}
+        self.viewer = viewer
+
+
+# ✅ Catalogue of representative operations. Budgets hold for the fixture
+# data from load_budget_fixtures() and must not grow with page size.
+BUDGETS = [
+    OperationBudget('product_listing', '''
+        query ProductListing {
+            productsPaginated(pagination: {pageSize: 20}) {
+                results {
+                    id title slug price availability
+                    images { id original }
+                    categories { name slug }
+                    stockRecords { price numInStock }
+                    attributes { id }
+                }
+                pageInfo { totalCount hasNextPage }
+            }
+        }
+    ''', max_queries=7, max_rows=120),
+    OperationBudget('filtered_listing', '''
+        query FilteredListing {
+            productsPaginated(
+                filters: {minPrice: 3000, inStock: true},
+                sort: {field: "price", direction: ASC},
+                pagination: {pageSize: 10}
+            ) {
+                results { title price availability }
+                pageInfo { hasNextPage }
+            }
+        }
+    ''', max_queries=2, max_rows=12),
+    OperationBudget('product_detail', '''
+        query ProductDetail($slug: String) {
+            product(slug: $slug) {
+                title description price availability
+                images { original }
+                categories { name parent { name } }
+                stockRecords { price numInStock }
+            }
+        }
+    ''', max_queries=6, max_rows=10, variables={'slug': 'budget-product-3'}),
+    OperationBudget('category_tree', '''
+        query CategoryTree {
+            categories { name slug parent { name } children { name children { name } } }
+        }
+    ''', max_queries=2, max_rows=30),
+    OperationBudget('service_listing', '''
+        query ServiceListing {
+            services(pagination: {pageSize: 20}) {
+                results {
+                    name price durationMinutes totalBookings
+                    category { name servicesCount }
+                    availableStaff { username }
+                }
+                pageInfo { totalCount }
+            }
+        }
+    ''', max_queries=6, max_rows=40),
+    OperationBudget('service_categories', '''
+        query ServiceCategories { serviceCategories { name slug servicesCount } }
+    ''', max_queries=2, max_rows=5),
+    OperationBudget('my_bookings', '''
+        query MyBookings {
+            myBookings(pagination: {pageSize: 20}) {
+                results { bookingId status canCancel service { name } staff { username } }
+            }
+        }
+    ''', max_queries=2, max_rows=61, viewer='customer'),
+    OperationBudget('all_bookings', '''
+        query AllBookings {
+            allBookings(pagination: {pageSize: 20}) {
+                results {
+                    bookingId status durationMinutes
+                    service { name category { slug } availableStaff { email } }
+                    staff { username }
+                    customer { email }
+                }
+            }
+        }
+    ''', max_queries=3, max_rows=121, viewer='staff'),
+]
+
+
+def load_budget_fixtures():
+    """
+    Deterministic catalogue the budgets are declared against: enough rows
+    per list that an N+1 query pattern breaks its budget. Returns the
+    viewers by name.
+    """
+    Product = get_model('catalogue', 'Product')
+    ProductClass = get_model('catalogue', 'ProductClass')
+    ProductImage = get_model('catalogue', 'ProductImage')
+    Category = get_model('catalogue', 'Category')
+    Partner = get_model('partner', 'Partner')
+    StockRecord = get_model('partner', 'StockRecord')
+    from booking.models import ServiceCategory, Service, Booking
+    User = get_user_model()
+
+    product_class = ProductClass.objects.create(name='Budget', slug='budget')
+    root = Category.add_root(name='Budget', slug='budget', is_public=True)
+    categories = []
+    for i in range(3):
+        category = root.add_child(name=f'Budget {i}', slug=f'budget-{i}', is_public=True)
+        category.add_child(name=f'Budget {i}.1', slug=f'budget-{i}-1', is_public=True)
+        category.add_child(name=f'Budget {i}.2', slug=f'budget-{i}-2', is_public=False)
+        categories.append(category)
+
+    partner = Partner.objects.create(name='Budget partner', code='budget')
+    for i in range(25):
+        product = Product.objects.create(
+            title=f'Budget product {i}', slug=f'budget-product-{i}', product_class=product_class,
+            structure='standalone', is_public=True, description='Budget product',
+        )
+        product.categories.add(root, categories[i % 3])
+        StockRecord.objects.create(
+            product=product, partner=partner, partner_sku=f'budget-{i}',
+            price=Decimal(1000 * (i + 1)), num_in_stock=i % 4,
+        )
+        if i % 2:
+            StockRecord.objects.create(
+                product=product, partner=partner, partner_sku=f'budget-{i}-b',
+                price=Decimal(5), num_in_stock=9,
+            )
+        ProductImage.objects.create(product=product, original=f'budget/{i}.jpg', display_order=0)
+
+    staff = User.objects.create_user('budget-staff', 'budget-staff@example.com', 'budget', is_staff=True)
+    customer = User.objects.create_user('budget-customer', 'budget-customer@example.com', 'budget')
+    service_categories = [
+        ServiceCategory.objects.create(name=f'Budget services {i}', slug=f'budget-services-{i}')
+        for i in range(3)
+    ]
+    start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+    for i in range(12):
+        service = Service.objects.create(
+            name=f'Budget service {i}', slug=f'budget-service-{i}', category=service_categories[i % 3],
+            description='Budget service', duration_minutes=30, price=Decimal(100 + i),
+        )
+        service.available_staff.add(staff)
+        for j in range(2):
+            start_datetime = start + timedelta(days=j, hours=i)
+            Booking.objects.create(
+                customer=customer, service=service, staff=staff,
+                start_datetime=start_datetime, end_datetime=start_datetime + timedelta(minutes=30),
+                status=('confirmed', 'pending')[j], customer_name='Budget customer',
+                customer_email=customer.email, customer_phone='0000000000',
+                original_price=service.price, final_price=service.price,
+            )
+    return {'staff': staff, 'customer': customer}
+
+
+# The resolver path being resolved, e.g. ``productsPaginated.results.images``
+_current_path = ContextVar('graphql_budget_path', default=OUTSIDE_RESOLVERS)
+
+
+class ResolverPathMiddleware:
+    """Attributes SQL to the path of the resolver that runs it"""
+    def resolve(self, next, root, info, **kwargs):
+        path = '.'.join(key for key in info.path.as_list() if isinstance(key, str))
+        token = _current_path.set(path)
+        try:
+            result = next(root, info, **kwargs)
+            # Evaluate lazy querysets while the path is still set
+            if isinstance(result, Manager):
+                result = result.all()
+            if isinstance(result, QuerySet):
+                result = list(result)
+            return result
+        finally:
+            _current_path.reset(token)
+
+
+class SQLCapture:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((_current_path.get(), sql))
+        return execute(sql, params, many, context)
+
+    def by_path(self):
+        grouped = OrderedDict()
+        for path, sql in self.queries:
+            grouped.setdefault(path, Counter())[sql] += 1
+        return grouped
+
+
+def count_objects(data):
+    if isinstance(data, list):
+        return sum(count_objects(item) for item in data)
+    if isinstance(data, dict):
+        return 1 + sum(count_objects(value) for value in data.values())
+    return 0
+
+
+class BudgetResult:
+    def __init__(self, budget, result, capture):
+        self.budget = budget
+        self.errors = result.errors or []
+        self.data = result.data
+        self.capture = capture
+        self.queries = len(capture.queries)
+        # The root object is not a row
+        self.rows = max(count_objects(result.data) - 1, 0)
+
+    @property
+    def breaches(self):
+        breaches = [f'GraphQL errors: {[str(error) for error in self.errors]}'] if self.errors else []
+        if self.queries > self.budget.max_queries:
+            breaches.append(f'{self.queries} SQL queries (budget {self.budget.max_queries})')
+        if self.rows > self.budget.max_rows:
+            breaches.append(f'{self.rows} result rows (budget {self.budget.max_rows})')
+        return breaches
+
+    def report(self):
+        lines = [f'{self.budget.name}: ' + '; '.join(self.breaches)]
+        for path, statements in self.capture.by_path().items():
+            lines.append(f'  {path} ({sum(statements.values())} queries)')
+            for sql, count in statements.items():
+                lines.append(f'    {count} x {sql}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def run_operation(budget, viewers=None):
+    """Execute ``budget.query`` the way /graphql/ would and capture its SQL"""
+    from api.schema import schema
+
+    request = RequestFactory().post('/graphql/')
+    request.user = (viewers or {}).get(budget.viewer) or AnonymousUser()
+    request.loaders = LoaderRegistry()
+    capture = SQLCapture()
+    with connection.execute_wrapper(capture):
+        result = schema.execute(
+            budget.query,
+            variable_values=budget.variables,
+            context_value=request,
+            middleware=[ResolverPathMiddleware()],
+        )
+    return BudgetResult(budget, result, capture)
+
+
+def assert_within_budget(budget, viewers=None):
+    """Run ``budget`` and raise QueryBudgetExceeded with its SQL by resolver path on a breach"""
+    result = run_operation(budget, viewers)
+    if result.breaches:
+        raise QueryBudgetExceeded(result.report())
+    return result
@@ -0,0 +1,137 @@
+# api/utils/response_cache.py
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from graphql import FieldNode, OperationType, get_operation_ast, print_ast
+from graphql_jwt.utils import get_http_authorization
+from api.utils.documents import LRUCache, query_hash
+
+RESPONSE_CACHE_KEY = 'api:response:{}'
+TAG_VERSION_KEY = 'api:response_tag:{}'
+
+# Root fields whose responses may be cached, with the tags every response
+# depends on. ``<model>:*`` covers list membership and ordering, so it is
+# bumped by any change to the model; ``<model>:<id>`` tags are added by
+# resolvers of single objects (see add_cache_tags) and only bumped when
+# that object changes.
+CACHEABLE_FIELDS = {
+    'products': {'product:*', 'category:*'},
+    'productsPaginated': {'product:*', 'category:*'},
+    'searchProducts': {'product:*', 'category:*'},
+    'product': {'category:*'},
+    'productById': {'category:*'},
+    'categories': {'category:*'},
+    'services': {'service:*', 'service_category:*'},
+    'service': {'service_category:*'},
+    'serviceById': {'service_category:*'},
+    'serviceCategories': {'service:*', 'service_category:*'},
+}
+
+
+def get_cache_timeout():
+    return getattr(settings, 'GRAPHQL_RESPONSE_CACHE_TIMEOUT', 0)
+
+
+def get_static_tags(document, operation_name):
+    """
+    Return the tags of a cacheable operation, or None when the operation
+    must always be executed (mutations, private fields, root fragments).
+    """
+    operation = get_operation_ast(document, operation_name)
+    if operation is None or operation.operation != OperationType.QUERY:
+        return None
+    tags = set()
+    for node in operation.selection_set.selections:
+        if not isinstance(node, FieldNode):
+            return None
+        name = node.name.value
+        if name == '__typename':
+            continue
+        if name not in CACHEABLE_FIELDS:
+            return None
+        tags |= CACHEABLE_FIELDS[name]
+    return tags or None
+
+
+def add_cache_tags(info, *tags):
+    """Record tags the current response depends on"""
+    collected = getattr(info.context, 'response_cache_tags', None)
+    if collected is not None:
+        collected.update(tags)
+
+
+def get_viewer_class(request):
+    # graphql_jwt authenticates inside the resolver middleware, so the token
+    # itself is checked here
+    if get_http_authorization(request) or request.user.is_authenticated:
+        return 'authenticated'
+    return 'anonymous'
+
+
+# Printed documents are normalized (whitespace, commas, comments), so
+# equivalent queries share entries
+_normalized_hashes = LRUCache(getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 500))
+
+
+def normalized_document_hash(query, document):
+    key = query_hash(query)
+    normalized = _normalized_hashes.get(key)
+    if normalized is None:
+        normalized = query_hash(print_ast(document))
+        _normalized_hashes.set(key, normalized)
+    return normalized
+
+
+def response_cache_key(query, document, variables, operation_name, request):
+    parts = json.dumps([
+        normalized_document_hash(query, document),
+        operation_name,
+        variables or {},
+        get_viewer_class(request),
+    ], sort_keys=True, default=str)
+    return RESPONSE_CACHE_KEY.format(hashlib.sha256(parts.encode('utf-8')).hexdigest())
+
+
+def new_tag_version():
+    # Random rather than incremented, so a version evicted from the cache is
+    # never reissued to entries stored under it
+    return uuid.uuid4().hex
+
+
+def get_tag_versions(tags):
+    """Current version of each tag, creating versions for new tags"""
+    keys = {tag: TAG_VERSION_KEY.format(tag) for tag in tags}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, new_tag_version(), None)
+            version = cache.get(key)
+        versions[tag] = version
+    return versions
+
+
+def get_cached_response(key):
+    """Cached ``data`` for ``key``, unless one of its tags was invalidated"""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    keys = {tag: TAG_VERSION_KEY.format(tag) for tag in entry['tags']}
+    current = cache.get_many(keys.values())
+    for tag, version in entry['tags'].items():
+        if current.get(keys[tag]) != version:
+            return None
+    return entry['data']
+
+
+def cache_response(key, data, tag_versions, timeout):
+    cache.set(key, {'data': data, 'tags': tag_versions}, timeout)
+
+
+def invalidate_tags(*tags):
+    """Drop every cached response that depends on one of ``tags``"""
+    version = new_tag_version()
+    cache.set_many({TAG_VERSION_KEY.format(tag): version for tag in tags}, None)
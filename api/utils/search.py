@@ -1,9 +1,15 @@
-from django.contrib.postgres.search import SearchVector, SearchQuery, SearchRank
-from django.db.models import Q, F
+import graphene
 from oscar.core.loading import get_model
+from api.loaders.registry import get_loaders
+from api.queries.product import PaginatedProductType
+from api.utils.pagination import PaginationInput, SortInput, paginate
+from api.utils.planner import plan_queryset
+from api.utils.search_index import search_products
+from api.utils.sort_keys import sort_products
+from api.utils.stock import annotate_primary_stockrecord
 
 Product = get_model('catalogue', 'Product')
-Category = get_model('catalogue', 'Category')
+ProductCategory = get_model('catalogue', 'ProductCategory')
 
 class ProductSearchEngine:
     @staticmethod
@@ -11,69 +17,74 @@ class ProductSearchEngine:
         """
         Advanced product search with full-text search and filters
         """
-        queryset = Product.objects.filter(structure='standalone')
-        
+        queryset = annotate_primary_stockrecord(Product.objects.filter(structure='standalone'))
+
         if query:
-            # PostgreSQL full-text search
-            search_vector = SearchVector('title', weight='A') + SearchVector('description', weight='B')
-            search_query = SearchQuery(query)
-            
-            queryset = queryset.annotate(
-                search=search_vector,
-                rank=SearchRank(search_vector, search_query)
-            ).filter(search=search_query).order_by('-rank')
-        
+            # PostgreSQL full-text search against the stored, GIN-indexed
+            # vectors (api.models.ProductSearchDocument)
+            queryset = search_products(queryset, query)
+
         # Apply additional filters
         if filters:
             queryset = ProductSearchEngine._apply_filters(queryset, filters)
-        
+
         return queryset
-    
+
     @staticmethod
     def _apply_filters(queryset, filters):
-        """Apply various filters to the queryset"""
-        
+        """
+        Apply various filters to the queryset. Prices and stock come from the
+        primary stock record and categories from a subquery, so rows are
+        never duplicated and distinct() (which defeats index-ordered
+        sorting) is not needed.
+        """
+
         if filters.get('categories'):
             category_slugs = filters['categories']
-            queryset = queryset.filter(categories__slug__in=category_slugs)
-        
+            queryset = queryset.filter(pk__in=ProductCategory.objects.filter(
+                category__slug__in=category_slugs
+            ).values('product_id'))
+
         if filters.get('price_range'):
             min_price = filters['price_range'].get('min')
             max_price = filters['price_range'].get('max')
-            
+
             if min_price is not None:
-                queryset = queryset.filter(stockrecords__price__gte=min_price)
+                queryset = queryset.filter(primary_price__gte=min_price)
             if max_price is not None:
-                queryset = queryset.filter(stockrecords__price__lte=max_price)
-        
-        if filters.get('availability'):
-            if filters['availability'] == 'in_stock':
-                queryset = queryset.filter(stockrecords__num_in_stock__gt=0)
-            elif filters['availability'] == 'out_of_stock':
-                queryset = queryset.filter(stockrecords__num_in_stock__lte=0)
-        
+                queryset = queryset.filter(primary_price__lte=max_price)
+
+        availability = getattr(filters.get('availability'), 'value', filters.get('availability'))
+        if availability == 'in_stock':
+            queryset = queryset.filter(primary_num_in_stock__gt=0)
+        elif availability == 'out_of_stock':
+            queryset = queryset.filter(primary_num_in_stock__lte=0)
+
         if filters.get('rating_min'):
-            # Assuming you have a rating system
-            queryset = queryset.filter(reviews__score__gte=filters['rating_min'])
-        
-        return queryset.distinct()
+            # Product.rating is the average score of its approved reviews
+            queryset = queryset.filter(rating__gte=filters['rating_min'])
+
+        return queryset
 
 # Enhanced Filter Input
+class PriceRangeInput(graphene.InputObjectType):
+    min = graphene.Float()
+    max = graphene.Float()
+
+AvailabilityFilter = graphene.Enum('AvailabilityFilter', [
+    ('IN_STOCK', 'in_stock'),
+    ('OUT_OF_STOCK', 'out_of_stock'),
+    ('ALL', 'all')
+])
+
 class AdvancedProductFilterInput(graphene.InputObjectType):
     search = graphene.String()
     categories = graphene.List(graphene.String)
-    price_range = graphene.InputObjectType('PriceRangeInput', [
-        ('min', graphene.Float()),
-        ('max', graphene.Float()),
-    ])
-    availability = graphene.Enum('AvailabilityFilter', [
-        ('IN_STOCK', 'in_stock'),
-        ('OUT_OF_STOCK', 'out_of_stock'),
-        ('ALL', 'all')
-    ])()
+    price_range = PriceRangeInput()
+    availability = AvailabilityFilter()
     rating_min = graphene.Float()
     brand = graphene.String()
-    
+
 class ProductSearchQuery:
     search_products = graphene.Field(
         PaginatedProductType,
@@ -82,18 +93,20 @@ class ProductSearchQuery:
         pagination=PaginationInput(),
         sort=SortInput()
     )
-    
+
     def resolve_search_products(self, info, query=None, filters=None, pagination=None, sort=None):
         # Use the search engine
         queryset = ProductSearchEngine.search_products(query, filters)
-        
-        # Apply sorting if no search query (search has its own ranking)
-        if not query and sort:
-            # Apply sorting logic
-            pass
-        
+
+        # An explicit sort replaces the relevance ranking
+        if sort:
+            queryset = sort_products(queryset, sort)
+        elif 'rank' in queryset.query.annotations:
+            queryset = queryset.order_by('-rank', 'pk')
+
+        queryset = plan_queryset(queryset, info)
+
         # Apply pagination
-        page = pagination.get('page', 1) if pagination else 1
-        page_size = pagination.get('page_size', 20) if pagination else 20
-        
-        return paginate_queryset(queryset, page, page_size)
\ No newline at end of file
+        result = paginate(queryset, pagination, info=info)
+        get_loaders(info).expect_products(result['results'])
+        return result
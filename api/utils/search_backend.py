@@ -0,0 +1,59 @@
+# api/utils/search_backend.py
+from haystack.backends import log_query
+from haystack.backends.simple_backend import SimpleEngine, SimpleSearchBackend, SimpleSearchQuery
+from haystack.models import SearchResult
+from oscar.core.loading import get_model
+from api.utils.change_log import product_changes
+from api.utils.inverted_index import get_product_index, index_products
+
+Product = get_model('catalogue', 'Product')
+
+
+class InvertedIndexSearchBackend(SimpleSearchBackend):
+    """
+    SimpleSearchBackend with product searches answered from the in-process
+    inverted index (api/utils/inverted_index.py) instead of ``icontains``
+    over every text column. Other models keep the simple backend.
+    """
+    def update(self, indexer, iterable, commit=True):
+        pks = [obj.pk for obj in iterable if isinstance(obj, Product)]
+        if pks:
+            index_products(get_product_index(), pks=pks)
+            for pk in pks:
+                product_changes.record(pk)
+
+    def remove(self, obj, commit=True):
+        if isinstance(obj, Product):
+            get_product_index().remove(obj.pk)
+            product_changes.record(obj.pk)
+
+    @log_query
+    def search(self, query_string, **kwargs):
+        models = kwargs.get('models')
+        if not query_string or query_string == '*' or (models and Product not in models):
+            return super().search(query_string, **kwargs)
+
+        start = kwargs.get('start_offset', 0)
+        end = kwargs.get('end_offset')
+        hits = get_product_index().search(query_string)
+        page = hits[start:end]
+        products = Product.objects.in_bulk([pk for pk, _ in page])
+
+        result_class = kwargs.get('result_class') or SearchResult
+        results = []
+        for pk, score in page:
+            product = products.get(pk)
+            if product is None:
+                continue
+            fields = dict(product.__dict__)
+            fields.pop('score', None)
+            result = result_class('catalogue', 'product', pk, score, **fields)
+            result._model = Product
+            result._object = product
+            results.append(result)
+        return {'results': results, 'hits': len(hits)}
+
+
+class InvertedIndexEngine(SimpleEngine):
+    backend = InvertedIndexSearchBackend
+    query = SimpleSearchQuery
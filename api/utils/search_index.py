@@ -0,0 +1,183 @@
+# api/utils/search_index.py
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils import timezone
+from api.models import ProductSearchDocument
+from api.utils.inverted_index import get_product_index
+
+DEFAULT_SEARCH_CONFIG = 'vietnamese_unaccent'
+
+# ProductSearchMode values
+FULL_TEXT = 'full_text'
+CONTAINS = 'contains'
+FUZZY = 'fuzzy'
+
+# pg_trgm GIN indexes on the catalogue. The UPPER() ones serve icontains,
+# which Django compiles to UPPER(column::text) LIKE UPPER(...)
+TRIGRAM_INDEXES = {
+    'product_title_trgm': '(title gin_trgm_ops)',
+    'product_title_upper_trgm': '(UPPER(title::text) gin_trgm_ops)',
+    'product_description_upper_trgm': '(UPPER(description::text) gin_trgm_ops)',
+}
+
+# Most in-process index hits a FULL_TEXT search without PostgreSQL returns
+MAX_INDEX_HITS = 1000
+
+# Whether the text search configuration / pg_trgm exist, checked once per
+# process (None until then): the api migrations create both, so a missing
+# one stays missing until the next deploy, or until ensure_*() runs here
+_search_config_ready = None
+_trigram_ready = None
+
+
+def get_search_config():
+    config = getattr(settings, 'PRODUCT_SEARCH_CONFIG', DEFAULT_SEARCH_CONFIG)
+    if not re.fullmatch(r'[a-z_][a-z0-9_]*', config):
+        raise ValueError(f'Invalid PRODUCT_SEARCH_CONFIG {config!r}')
+    return config
+
+
+def ensure_search_config():
+    """
+    Create the unaccent extension and a copy of the 'simple' text search
+    configuration that strips diacritics, so "dieu hoa" matches "điều hòa"
+    both in the index and in queries.
+    """
+    global _search_config_ready
+    config = get_search_config()
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+        cursor.execute(f'''
+            DO $$ BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{config}') THEN
+                    CREATE TEXT SEARCH CONFIGURATION {config} (COPY = simple);
+                    ALTER TEXT SEARCH CONFIGURATION {config}
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+                END IF;
+            END $$
+        ''')
+    _search_config_ready = True
+
+
+def search_index_available():
+    """True on PostgreSQL once the text search configuration exists (api migration 0001)"""
+    global _search_config_ready
+    if connection.vendor != 'postgresql':
+        return False
+    if _search_config_ready is None:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_ts_config WHERE cfgname = %s', [get_search_config()])
+            _search_config_ready = cursor.fetchone() is not None
+    return _search_config_ready
+
+
+def ensure_trigram_indexes():
+    """
+    Install pg_trgm and build TRIGRAM_INDEXES without locking writes.
+    CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    """
+    global _trigram_ready
+    Product = ProductSearchDocument._meta.get_field('product').related_model
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, definition in TRIGRAM_INDEXES.items():
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                f'ON {Product._meta.db_table} USING gin {definition}'
+            )
+    _trigram_ready = True
+
+
+def trigram_available():
+    global _trigram_ready
+    if connection.vendor != 'postgresql':
+        return False
+    if _trigram_ready is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_ready = cursor.fetchone() is not None
+    return _trigram_ready
+
+
+def _upsert_sql(where):
+    config = get_search_config()
+    document_table = ProductSearchDocument._meta.db_table
+    product_table = ProductSearchDocument._meta.get_field('product').related_model._meta.db_table
+    return f'''
+        INSERT INTO {document_table} (product_id, search_vector, updated_at)
+        SELECT p.id,
+               setweight(to_tsvector('{config}', coalesce(p.title, '')), 'A') ||
+               setweight(to_tsvector('{config}', coalesce(p.description, '')), 'B'),
+               %s
+        FROM {product_table} p
+        WHERE {where}
+        ON CONFLICT (product_id) DO UPDATE
+        SET search_vector = EXCLUDED.search_vector, updated_at = EXCLUDED.updated_at
+    '''
+
+
+def update_search_documents(product_ids):
+    """Recompute the search documents of the given products"""
+    if not product_ids:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql('p.id = ANY(%s)'), [timezone.now(), list(product_ids)])
+        return cursor.rowcount
+
+
+def rebuild_search_documents(batch_size=5000, log=print):
+    """Recompute every product's search document, one transaction per id range"""
+    Product = ProductSearchDocument._meta.get_field('product').related_model
+    ensure_search_config()
+    ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return 0
+    total = 0
+    for start in range(first, last + 1, batch_size):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                _upsert_sql('p.id >= %s AND p.id < %s'), [timezone.now(), start, start + batch_size]
+            )
+            total += cursor.rowcount
+        log(f'{min(start + batch_size - 1, last)}/{last}')
+    return total
+
+
+def search_products(queryset, query, rank=True, mode=FULL_TEXT):
+    """
+    Filter ``queryset`` (of products) to matches of ``query``:
+
+    - FULL_TEXT: the stored vectors, ranked with ts_rank
+    - CONTAINS: substring of the title or description (trigram indexed)
+    - FUZZY: title words similar to the query, tolerating typos, ranked
+      by trigram word similarity
+
+    ``rank`` is annotated unless ``rank=False``. Without the stored vectors
+    FULL_TEXT uses the in-process BM25 index (api/utils/inverted_index.py);
+    FUZZY without pg_trgm falls back to CONTAINS.
+    """
+    if mode == FULL_TEXT and search_index_available():
+        search_query = SearchQuery(query, config=get_search_config(), search_type='websearch')
+        queryset = queryset.filter(search_document__search_vector=search_query)
+        if rank:
+            queryset = queryset.annotate(rank=SearchRank(F('search_document__search_vector'), search_query))
+        return queryset
+    if mode == FULL_TEXT:
+        hits = get_product_index().search(query, limit=MAX_INDEX_HITS)
+        queryset = queryset.filter(pk__in=[pk for pk, _ in hits])
+        if rank and hits:
+            queryset = queryset.annotate(rank=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in hits], output_field=FloatField()
+            ))
+        return queryset
+    if mode == FUZZY and trigram_available():
+        # The <% operator, served by product_title_trgm
+        queryset = queryset.filter(title__trigram_word_similar=query)
+        if rank:
+            queryset = queryset.annotate(rank=TrigramWordSimilarity(query, 'title'))
+        return queryset
+    return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
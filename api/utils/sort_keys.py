@@ -0,0 +1,111 @@
+# api/utils/sort_keys.py
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Subquery, Value
+from django.db.models.functions import Coalesce
+from graphql import GraphQLError
+from oscar.core.loading import get_model
+from api.models import ProductSortKey
+from api.utils.stock import primary_stockrecords
+
+Product = get_model('catalogue', 'Product')
+
+ASC = 'asc'
+DESC = 'desc'
+
+# SortInput.field -> (key, direction when none is given). Every key is the
+# leading column of an index ending with the product id, so either
+# direction is a forward or backward index scan that stops after one page.
+PRODUCT_SORTS = {
+    'title': ('title', ASC),
+    'newest': ('date_created', DESC),
+    'date_created': ('date_created', DESC),
+    'price': ('sort_key__price', ASC),
+    'popularity': ('sort_key__popularity', DESC),
+}
+
+# Value of a sort key missing from the outer joined ProductSortKey, the
+# same default rebuild_sort_keys() stores
+DEFAULT_SORT_VALUES = {
+    'sort_key__popularity': Value(0.0, output_field=FloatField()),
+}
+
+# Listings filter structure = 'standalone', which these partial indexes
+# match; price and popularity use the ProductSortKey indexes
+SORT_INDEXES = {
+    'product_standalone_title': "(title, id) WHERE structure = 'standalone'",
+    'product_standalone_date_created': "(date_created, id) WHERE structure = 'standalone'",
+}
+
+
+def sort_products(queryset, sort):
+    """
+    Order ``queryset`` (of products) by a SortInput, with the primary key
+    as tie-breaker in the same direction. NULL prices sort last ascending
+    and first descending, PostgreSQL's default and cursor pagination's.
+    Sort keys are outer joined: a product without a ProductSortKey row
+    (not yet backfilled) sorts as having no price and no popularity
+    instead of dropping out of the listing.
+    """
+    field = sort.get('field')
+    if field not in PRODUCT_SORTS:
+        raise GraphQLError(f"Unknown sort field {field!r}; expected one of {', '.join(PRODUCT_SORTS)}")
+    key, default_direction = PRODUCT_SORTS[field]
+    direction = getattr(sort.get('direction'), 'value', sort.get('direction')) or default_direction
+
+    expression = F(key)
+    if key in DEFAULT_SORT_VALUES:
+        expression = Coalesce(expression, DEFAULT_SORT_VALUES[key])
+    if direction == DESC:
+        return queryset.order_by(expression.desc(nulls_first=True), '-pk')
+    return queryset.order_by(expression.asc(nulls_last=True), 'pk')
+
+
+def ensure_sort_indexes():
+    """Build SORT_INDEXES without locking writes (PostgreSQL only)"""
+    with connection.cursor() as cursor:
+        for name, definition in SORT_INDEXES.items():
+            cursor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                f'ON {Product._meta.db_table} {definition}'
+            )
+
+
+def _sort_key_rows(queryset):
+    return queryset.annotate(
+        sort_price=Subquery(primary_stockrecords().values('price')[:1]),
+        sort_popularity=Coalesce('stats__score', Value(0.0), output_field=FloatField()),
+    ).values_list('pk', 'sort_price', 'sort_popularity')
+
+
+def _upsert(rows):
+    ProductSortKey.objects.bulk_create(
+        [ProductSortKey(product_id=pk, price=price, popularity=popularity) for pk, price, popularity in rows],
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['price', 'popularity', 'updated_at'],
+    )
+
+
+def update_sort_keys(product_ids):
+    """Recompute the sort keys of the given products; deleted ones are skipped"""
+    rows = list(_sort_key_rows(Product.objects.filter(pk__in=product_ids)))
+    if rows:
+        _upsert(rows)
+    return len(rows)
+
+
+def rebuild_sort_keys(batch_size=5000, log=print):
+    """Recompute every product's sort key, one transaction per id range"""
+    ids = Product.objects.order_by('pk').values_list('pk', flat=True)
+    first, last = ids.first(), ids.last()
+    if first is None:
+        return 0
+    total = 0
+    for start in range(first, last + 1, batch_size):
+        with transaction.atomic():
+            rows = list(_sort_key_rows(Product.objects.filter(pk__gte=start, pk__lt=start + batch_size)))
+            if rows:
+                _upsert(rows)
+            total += len(rows)
+        log(f'{min(start + batch_size - 1, last)}/{last}')
+    return total
@@ -0,0 +1,28 @@
+# api/utils/stock.py
+from django.db.models import OuterRef, Subquery
+from oscar.core.loading import get_model
+
+StockRecord = get_model('partner', 'StockRecord')
+
+# Oscar's default strategy (UseFirstStockRecord) fulfils a product from
+# ``product.stockrecords.all()[0]``. Ordering by pk makes that choice stable
+# and is the same ordering the product stock record loader uses.
+PRIMARY_STOCKRECORD_ORDERING = ('pk',)
+
+
+def primary_stockrecords():
+    """Stock records of the outer product, primary record first"""
+    return StockRecord.objects.filter(product=OuterRef('pk')).order_by(*PRIMARY_STOCKRECORD_ORDERING)
+
+
+def annotate_primary_stockrecord(queryset):
+    """
+    Annotate a Product queryset with the id, price and num_in_stock of each
+    product's primary stock record. Products without stock records get None.
+    """
+    stockrecords = primary_stockrecords()
+    return queryset.annotate(
+        primary_stockrecord_id=Subquery(stockrecords.values('pk')[:1]),
+        primary_price=Subquery(stockrecords.values('price')[:1]),
+        primary_num_in_stock=Subquery(stockrecords.values('num_in_stock')[:1]),
+    )
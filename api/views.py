@@ -2,16 +2,444 @@ from django.shortcuts import render
 
 # Create your views here.
 # api/views.py
-from django.http import JsonResponse
+import json
+from inspect import isawaitable
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
 from django.conf import settings
-from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import OperationType, execute, get_operation_ast
+from graphql.execution import ExecutionResult
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.utils import get_http_authorization
 from oscar.core.loading import get_model
+from api.loaders.registry import LoaderRegistry
+from api.utils.documents import (
+    PersistedQueryError, resolve_persisted_query, get_document, is_introspection,
+    introspection_cache_key, get_cached_introspection, cache_introspection
+)
+from api.utils.complexity import check_query_limits
+from api.utils.response_cache import (
+    get_cache_timeout, get_static_tags, response_cache_key, get_cached_response,
+    get_tag_versions, cache_response
+)
+from api.utils.async_execution import AsyncResolverMiddleware
+from api.utils.metrics import resolver_metrics
+from api.utils.json_encoding import encode_response
 
 Product = get_model('catalogue', 'Product')
 Category = get_model('catalogue', 'Category')
 
+class PreparedOperation:
+    """State carried from validation to execution of one operation"""
+    def __init__(self, document, operation_ast, extensions):
+        self.document = document
+        self.operation_ast = operation_ast
+        self.extensions = extensions
+        self.cache_key = None
+        self.cache_tags = None
+        self.tag_versions = None
+        self.introspection_key = None
+    
+    @property
+    def is_mutation(self):
+        return self.operation_ast is not None and self.operation_ast.operation == OperationType.MUTATION
+
+
+class APIGraphQLView(GraphQLView):
+    """
+    GraphQL endpoint that gives every request its own set of DataLoaders,
+    supports Automatic Persisted Queries, reuses parsed documents,
+    rejects operations over the cost and depth limits, caches public
+    read responses and accepts batches of operations as a JSON array.
+    Responses are encoded to bytes by the GRAPHQL_JSON_ENCODER.
+    """
+    
+    @method_decorator(ensure_csrf_cookie)
+    def dispatch(self, request, *args, **kwargs):
+        # GraphQLView.dispatch, joining the encoded bytes of a batch
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+            
+            data = self.parse_body(request)
+            show_graphiql = (
+                self.graphiql and not self.batch and self.can_display_graphiql(request, data)
+            )
+            
+            if show_graphiql:
+                return super().dispatch(request, *args, **kwargs)
+            
+            if self.batch:
+                result, status_code = self.join_batch(
+                    [self.get_response(request, entry) for entry in data]
+                )
+            else:
+                result, status_code = self.get_response(request, data, show_graphiql)
+            
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+        
+        except HttpError as e:
+            return self.error_response(request, e)
+    
+    def json_encode(self, request, d, pretty=False):
+        # Bytes, written to the response without another copy
+        pretty = self.pretty or pretty or bool(request.GET.get("pretty"))
+        return encode_response(d, pretty=pretty)
+    
+    @staticmethod
+    def join_batch(responses):
+        result = b"[" + b",".join(response[0] for response in responses) + b"]"
+        status_code = max(response[1] for response in responses)
+        return result, status_code
+    
+    def error_response(self, request, error):
+        response = error.response
+        response["Content-Type"] = "application/json"
+        response.content = self.json_encode(request, {"errors": [self.format_error(error)]})
+        return response
+    
+    def get_context(self, request):
+        # Operations of a batch share the request's loaders
+        if getattr(request, 'loaders', None) is None:
+            request.loaders = LoaderRegistry()
+        request.response_cache_tags = set()
+        return request
+    
+    def parse_body(self, request):
+        # A JSON array is a batch of operations, answered with an array in
+        # the same order
+        if self.get_content_type(request) != "application/json":
+            return super().parse_body(request)
+        
+        try:
+            body = request.body.decode("utf-8")
+        except Exception as e:
+            raise HttpError(HttpResponseBadRequest(str(e)))
+        
+        try:
+            request_json = json.loads(body)
+        except (TypeError, ValueError):
+            raise HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+        
+        if isinstance(request_json, list):
+            max_batch_size = getattr(settings, 'GRAPHQL_MAX_BATCH_SIZE', 10)
+            if not request_json:
+                raise HttpError(HttpResponseBadRequest("Received an empty list in the batch request."))
+            if len(request_json) > max_batch_size:
+                raise HttpError(HttpResponseBadRequest(
+                    f"Batch of {len(request_json)} operations exceeds the limit of {max_batch_size}."
+                ))
+            if not all(isinstance(entry, dict) for entry in request_json):
+                raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+            self.batch = True
+            return request_json
+        
+        if not isinstance(request_json, dict):
+            raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        return request_json
+    
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        return extensions
+    
+    @staticmethod
+    def atomic_mutations():
+        return (
+            graphene_settings.ATOMIC_MUTATIONS is True
+            or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+        )
+    
+    def prepare_operation(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        """
+        Everything that happens before execution. Returns a PreparedOperation,
+        or the ExecutionResult (or None) to respond with right away.
+        """
+        try:
+            query = resolve_persisted_query(query, self.get_extensions(request, data))
+        except PersistedQueryError as e:
+            return ExecutionResult(errors=[e])
+        
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+        
+        # Parsing and validation are cached per document hash
+        document, validation_errors = get_document(self.schema.graphql_schema, query)
+        if document is None:
+            return ExecutionResult(errors=validation_errors)
+        
+        operation_ast = get_operation_ast(document, operation_name)
+        if request.method.lower() == "get":
+            if operation_ast and operation_ast.operation != OperationType.QUERY:
+                if show_graphiql:
+                    return None
+                
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["POST"],
+                        "Can only perform a {} operation from a POST request.".format(
+                            operation_ast.operation.value
+                        ),
+                    )
+                )
+        
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+        
+        cost_report, cost_errors = check_query_limits(
+            self.schema.graphql_schema, document, operation_name, variables
+        )
+        extensions = {'cost': cost_report} if cost_report else None
+        if cost_errors:
+            return ExecutionResult(data=None, errors=cost_errors, extensions=extensions)
+        
+        prepared = PreparedOperation(document, operation_ast, extensions)
+        
+        cache_tags = get_static_tags(document, operation_name) if get_cache_timeout() else None
+        if cache_tags is not None:
+            prepared.cache_key = response_cache_key(query, document, variables, operation_name, request)
+            cached = get_cached_response(prepared.cache_key)
+            if cached is not None:
+                return ExecutionResult(cached, None, extensions)
+            # Versions are read before executing, so an invalidation that
+            # lands mid-request leaves the new entry already stale
+            prepared.cache_tags = cache_tags
+            prepared.tag_versions = get_tag_versions(cache_tags)
+        
+        if is_introspection(document, operation_name):
+            prepared.introspection_key = introspection_cache_key(query, variables, operation_name)
+            cached = get_cached_introspection(prepared.introspection_key)
+            if cached is not None:
+                return ExecutionResult(cached.data, cached.errors, extensions)
+        
+        return prepared
+    
+    def get_execute_options(self, request, prepared, variables, operation_name):
+        options = {
+            "schema": self.schema.graphql_schema,
+            "document": prepared.document,
+            "root_value": self.get_root_value(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "context_value": self.get_context(request),
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            options["execution_context_class"] = self.execution_context_class
+        return options
+    
+    @staticmethod
+    def reset_loaders(request, prepared):
+        # Later operations of a batch must not see data loaded before a mutation
+        if prepared.is_mutation:
+            request.loaders = None
+    
+    def finish_operation(self, request, prepared, result):
+        """Store the result in the introspection and response caches"""
+        if prepared.introspection_key is not None:
+            cache_introspection(prepared.introspection_key, result)
+        if prepared.cache_tags is not None and not result.errors:
+            prepared.tag_versions.update(
+                get_tag_versions(request.response_cache_tags - prepared.cache_tags)
+            )
+            cache_response(prepared.cache_key, result.data, prepared.tag_versions, get_cache_timeout())
+        return ExecutionResult(result.data, result.errors, prepared.extensions)
+    
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        prepared = self.prepare_operation(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+        
+        try:
+            options = self.get_execute_options(request, prepared, variables, operation_name)
+            if prepared.is_mutation and self.atomic_mutations():
+                with transaction.atomic():
+                    result = execute(**options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            else:
+                result = execute(**options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        finally:
+            self.reset_loaders(request, prepared)
+        
+        return self.finish_operation(request, prepared, result)
+    
+    def build_response(self, request, execution_result, id, show_graphiql=False):
+        # Same as the end of GraphQLView.get_response, plus the result's extensions
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+        
+        status_code = 200
+        if execution_result:
+            response = {}
+            
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+            
+            if execution_result.errors and any(
+                not getattr(e, "path", None) for e in execution_result.errors
+            ):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+            
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+            
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+            
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+        
+        return result, status_code
+    
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return self.build_response(request, execution_result, id, show_graphiql)
+
+
+class AsyncAPIGraphQLView(APIGraphQLView):
+    """
+    APIGraphQLView for ASGI deployments. Operations run with graphql-core's
+    async executor: coroutine resolvers are awaited on the event loop and
+    sync resolvers go through a bounded ``sync_to_async`` pool, so a worker
+    keeps serving other requests while resolvers wait on I/O.
+    """
+    view_is_async = True
+    
+    def get_middleware(self, request):
+        # Innermost, so it sees the field resolver itself
+        return [AsyncResolverMiddleware()] + list(self.middleware or [])
+    
+    @staticmethod
+    def authenticate(request):
+        # Resolve the session user and the JWT before execution, so the JWT
+        # middleware does not query the database on the event loop
+        if request.user.is_anonymous and get_http_authorization(request) is not None:
+            try:
+                user = authenticate(request=request)
+            except JSONWebTokenError as e:
+                # Raised for the root fields by AsyncResolverMiddleware, as the
+                # JWT middleware would
+                user = None
+                request.jwt_authentication_error = e
+            # Set after authenticate(), which skips flagged requests: stops
+            # the JWT middleware from authenticating again on the event loop,
+            # also when the token's user no longer exists
+            request._jwt_token_auth = True
+            if user is not None:
+                request.user = user
+    
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(
+                        ["GET", "POST"], "GraphQL only supports GET and POST requests."
+                    )
+                )
+            
+            data = self.parse_body(request)
+            show_graphiql = (
+                self.graphiql and not self.batch and self.can_display_graphiql(request, data)
+            )
+            
+            if show_graphiql:
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+            
+            await sync_to_async(self.authenticate)(request)
+            
+            if self.batch:
+                result, status_code = self.join_batch(
+                    [await self.get_response_async(request, entry) for entry in data]
+                )
+            else:
+                result, status_code = await self.get_response_async(request, data, show_graphiql)
+            
+            return HttpResponse(
+                status=status_code, content=result, content_type="application/json"
+            )
+        
+        except HttpError as e:
+            return self.error_response(request, e)
+    
+    async def get_response_async(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        
+        execution_result = await self.execute_graphql_request_async(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        return await sync_to_async(self.build_response)(request, execution_result, id, show_graphiql)
+    
+    async def execute_graphql_request_async(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        prepared = await sync_to_async(self.prepare_operation)(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+        
+        if prepared.is_mutation and self.atomic_mutations():
+            # A transaction cannot stay open across awaits
+            return await sync_to_async(self.execute_graphql_request)(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        
+        try:
+            options = self.get_execute_options(request, prepared, variables, operation_name)
+            result = execute(**options)
+            if isawaitable(result):
+                result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        finally:
+            self.reset_loaders(request, prepared)
+        
+        return await sync_to_async(self.finish_operation)(request, prepared, result)
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def health_check(request):
@@ -43,6 +471,8 @@ def api_status(request):
                 'graphql': '/graphql/',
                 'admin': '/admin/',
                 'health': '/health/',
+                'metrics': '/health/metrics/',
+                'export_products': '/api/export/products/',
                 'auth': {
                     'token': '/api/auth/token/',
                     'refresh': '/api/auth/token/refresh/',
@@ -56,6 +486,14 @@ def api_status(request):
             'message': str(e)
         }, status=500)
 
+@csrf_exempt
+@require_http_methods(["GET"])
+def metrics(request):
+    """Resolver timing and SQL histograms in Prometheus text format"""
+    return HttpResponse(
+        resolver_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def api_info(request):
@@ -85,4 +523,104 @@ def api_info(request):
             'JWT',
             'SQLite/PostgreSQL',
         ]
-    })
\ No newline at end of file
+    })
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_MAX_CHUNK_SIZE = 5000
+
+def _export_product_row(product, loaders):
+    return {
+        'id': product.pk,
+        'upc': product.upc,
+        'title': product.title,
+        'slug': product.slug,
+        'description': product.description,
+        'is_public': product.is_public,
+        'product_class_id': product.product_class_id,
+        'date_created': product.date_created,
+        'date_updated': product.date_updated,
+        'stock_records': [
+            {
+                'partner_id': stockrecord.partner_id,
+                'partner_sku': stockrecord.partner_sku,
+                'price': stockrecord.price,
+                'price_currency': stockrecord.price_currency,
+                'num_in_stock': stockrecord.num_in_stock,
+            }
+            for stockrecord in loaders.product_stockrecords.load(product.pk)
+        ],
+        'categories': [
+            {'id': category.pk, 'slug': category.slug, 'name': category.name}
+            for category in loaders.product_categories.load(product.pk)
+        ],
+        'images': [
+            {
+                'url': image.original.url if image.original else None,
+                'caption': image.caption,
+                'display_order': image.display_order,
+            }
+            for image in loaders.product_images.load(product.pk)
+        ],
+    }
+
+def _export_product_chunk(products):
+    # A fresh registry per chunk keeps memory flat: relations are fetched
+    # in one query per chunk and dropped once the chunk is written
+    loaders = LoaderRegistry()
+    loaders.expect_products(products)
+    return b''.join(
+        encode_response(_export_product_row(product, loaders)) + b'\n'
+        for product in products
+    )
+
+def _export_product_lines(chunk_size):
+    queryset = Product.objects.filter(structure='standalone').order_by('pk')
+    chunk = []
+    for product in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(product)
+        if len(chunk) >= chunk_size:
+            yield _export_product_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield _export_product_chunk(chunk)
+
+def _export_product_page(after_pk, chunk_size):
+    """(NDJSON of the next chunk_size products after ``after_pk``, last pk); (None, after_pk) at the end"""
+    products = list(
+        Product.objects.filter(structure='standalone', pk__gt=after_pk).order_by('pk')[:chunk_size]
+    )
+    if not products:
+        return None, after_pk
+    return _export_product_chunk(products), products[-1].pk
+
+async def _aexport_product_lines(chunk_size):
+    # Under ASGI a sync iterator is consumed with sync_to_async(list), which
+    # buffers the whole export; fetch one keyset page per await instead
+    fetch_page = sync_to_async(_export_product_page)
+    after_pk = 0
+    while True:
+        chunk, after_pk = await fetch_page(after_pk, chunk_size)
+        if chunk is None:
+            return
+        yield chunk
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def export_products(request):
+    """Stream every standalone product as NDJSON, one product per line"""
+    try:
+        chunk_size = int(request.GET.get('chunk_size', EXPORT_CHUNK_SIZE))
+    except ValueError:
+        chunk_size = EXPORT_CHUNK_SIZE
+    chunk_size = min(max(chunk_size, 1), EXPORT_MAX_CHUNK_SIZE)
+
+    if isinstance(request, ASGIRequest):
+        lines = _aexport_product_lines(chunk_size)
+    else:
+        lines = _export_product_lines(chunk_size)
+    response = StreamingHttpResponse(
+        lines,
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="products.ndjson"'
+    return response
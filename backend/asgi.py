@@ -1,5 +1,10 @@
 # asgi.py
 import os
+
+# The async GraphQL view only pays off under ASGI; WSGI keeps the sync view
+# (backend/settings.py GRAPHQL_ASYNC_VIEW). Set before settings are read.
+os.environ.setdefault('GRAPHQL_ASYNC_VIEW', 'true')
+
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.sites',
     'django.contrib.flatpages',
+    'django.contrib.postgres',  # search and trigram lookups
 
     # Oscar Core Apps (Minimal for headless backend)
     'oscar.config.Shop',
@@ -97,6 +98,17 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# Shared by every worker: the category tree version stamp, response cache
+# tag versions and the change logs the in-process indexes replay only work
+# across processes with a shared backend (not the per-process LocMemCache)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+        'KEY_PREFIX': 'backend',
+    },
+}
 # Oscar settings
 OSCAR_SLUG_MAP = {
     'catalogue.Product': 'name',  # ✅ Đúng
@@ -307,10 +319,84 @@ REST_FRAMEWORK = {
 GRAPHENE = {
     'SCHEMA': 'api.schema.schema',  # Path to your GraphQL schema
     'MIDDLEWARE': [
+        # Innermost first: resolver metrics wrap the resolver itself
+        'api.utils.metrics.ResolverMetricsMiddleware',
         'graphql_jwt.middleware.JSONWebTokenMiddleware',
     ],
 }
 
+# Distinct operation names with their own metric series at /health/metrics/
+GRAPHQL_METRICS_MAX_OPERATIONS = 200
+
+# Parsed/validated GraphQL documents kept in memory per worker, and how
+# long Automatic Persisted Queries stay registered (None = no expiry)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+GRAPHQL_APQ_TIMEOUT = 60 * 60 * 24 * 7
+
+# Seconds a JWT's user stays cached per worker (0 disables), and how many
+# tokens are kept. Saves and deletes of the user drop the entry right away.
+GRAPHQL_JWT_USER_CACHE_TIMEOUT = 60
+GRAPHQL_JWT_USER_CACHE_SIZE = 10000
+
+# PostgreSQL text search configuration of the stored product search vectors
+# (api.models.ProductSearchDocument): 'simple' with unaccent, created by
+# python manage.py rebuild_search_index
+PRODUCT_SEARCH_CONFIG = 'vietnamese_unaccent'
+
+# Query cost analysis: operations deeper than MAX_DEPTH or costing more
+# than MAX_COST are rejected before execution (see api/utils/complexity.py)
+GRAPHQL_QUERY_LIMITS = {
+    'MAX_DEPTH': 10,
+    'MAX_COST': 10000,
+    'DEFAULT_LIST_SIZE': 20,
+    'LIST_SIZES': {
+        # Unpaginated lists that return a whole table
+        'Query.products': 1000,
+        'Query.categories': 200,
+        'Query.serviceCategories': 50,
+    },
+    'FIELD_COSTS': {
+        'Query.productsPaginated': 5,
+        'Query.searchProducts': 5,
+        'Query.services': 5,
+        'Query.myBookings': 5,
+        'Query.allBookings': 5,
+        'Query.availableTimeSlots': 5,
+        'PaginatedProduct.facets': 5,
+    },
+}
+# Hard cap on pagination.pageSize for every paginated field
+GRAPHQL_MAX_PAGE_SIZE = 100
+# Most operations accepted in one batched (JSON array) request
+GRAPHQL_MAX_BATCH_SIZE = 10
+
+# Seconds public catalogue/service responses stay in the response cache;
+# entries are also dropped by model signals (api/signals.py), which needs
+# the shared CACHES backend above (check api.W001). 0 disables it.
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = 60 * 10
+# Seconds facet counts stay cached per filter combination (api/utils/facets.py)
+GRAPHQL_FACET_CACHE_TIMEOUT = 60
+
+# Class with encode(data, pretty=False) -> bytes for GraphQL and export
+# responses; defaults to OrjsonEncoder when orjson is installed
+# (compare with: python manage.py benchmark_json)
+GRAPHQL_JSON_ENCODER = 'api.utils.json_encoding.OrjsonEncoder'
+
+# Serve /graphql/ with the async view (api.views.AsyncAPIGraphQLView).
+# Sync resolvers then run in threads, at most GRAPHQL_ASYNC_MAX_THREADS at once.
+# Off by default; backend/asgi.py turns it on for ASGI deployments, since
+# under WSGI every request would pay for an event loop and thread hops.
+GRAPHQL_ASYNC_VIEW = os.getenv('GRAPHQL_ASYNC_VIEW', 'false').lower() == 'true'
+GRAPHQL_ASYNC_MAX_THREADS = 10
+
+# pageInfo.totalCount switches to PostgreSQL row estimates (when the client
+# passes estimateCount) once the estimate reaches this many rows
+GRAPHQL_COUNT_ESTIMATE_THRESHOLD = 100000
+
+# Read ServiceType.totalBookings from the denormalized
+# Service.total_bookings_count column instead of a grouped COUNT
+BOOKING_DENORMALIZED_COUNTS = False
+
 # File upload settings
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -340,16 +426,21 @@ OSCAR_DEFAULT_CURRENCY = 'VND'
 OSCAR_FROM_EMAIL = 'noreply@myshop.com'
 OSCAR_ALLOW_ANON_CHECKOUT = True
 
-# Haystack Configuration (simple backend for development)
+# Haystack Configuration: products are served from the in-process inverted
+# index (api/utils/inverted_index.py), other models by the simple backend
 HAYSTACK_CONNECTIONS = {
     'default': {
-        'ENGINE': 'haystack.backends.simple_backend.SimpleEngine',
+        'ENGINE': 'api.utils.search_backend.InvertedIndexEngine',
     },
 }
+# File `manage.py build_product_index` writes and workers memory-map at
+# startup instead of rebuilding the index; built in memory when missing
+PRODUCT_INDEX_PATH = BASE_DIR / 'var' / 'product_index.bin'
 
 # Thumbnail settings
 THUMBNAIL_FORMAT = 'JPEG'
 THUMBNAIL_KEY_PREFIX = 'thumbnail'
+OSCAR_THUMBNAILER = 'oscar.core.thumbnails.SorlThumbnail'  # dùng khi xóa ảnh (OSCAR_DELETE_IMAGE_FILES)
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -366,6 +457,8 @@ VNPAY_CONFIG = {
 
 # Authentication Backends
 AUTHENTICATION_BACKENDS = [
+    # JWTs of the GraphQL API, with the user cached per token (api/utils/jwt_cache.py)
+    'api.utils.jwt_cache.CachedJSONWebTokenBackend',
     'oscar.apps.customer.auth_backends.EmailBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
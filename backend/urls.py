@@ -3,26 +3,32 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from api.views import APIGraphQLView, AsyncAPIGraphQLView, export_products
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
 
+# Async execution when served through ASGI (backend/asgi.py)
+GraphQLEndpoint = AsyncAPIGraphQLView if settings.GRAPHQL_ASYNC_VIEW else APIGraphQLView
+
 urlpatterns = [
     # Admin interface (optional for headless)
     path('admin/', admin.site.urls),
     
     # GraphQL endpoint (main API)
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=settings.DEBUG))),
+    path('graphql/', csrf_exempt(GraphQLEndpoint.as_view(graphiql=settings.DEBUG))),
     
     # JWT Authentication endpoints
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
     
+    # Streaming catalogue export (NDJSON) for feed and sync jobs
+    path('api/export/products/', export_products, name='export_products'),
+    
     # Health check endpoint
     path('health/', include('api.urls')),
     
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.5 on 2026-10-17 11:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Booking.COUNTED_STATUSES when this migration was written
+COUNTED_STATUSES = ['confirmed', 'completed']
+
+
+def fill_total_bookings_count(apps, schema_editor):
+    """Same as booking.signals.refresh_total_bookings_count()"""
+    Booking = apps.get_model('booking', 'Booking')
+    Service = apps.get_model('booking', 'Service')
+    counts = (
+        Booking.objects
+        .filter(service=OuterRef('pk'), status__in=COUNTED_STATUSES)
+        .order_by()
+        .values('service')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Service.objects.update(total_bookings_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='total_bookings_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_total_bookings_count, migrations.RunPython.noop),
+    ]
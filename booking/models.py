@@ -37,6 +37,10 @@ class Service(models.Model):
     min_advance_hours = models.PositiveIntegerField(default=2, help_text="Minimum hours in advance")
     max_bookings_per_day = models.PositiveIntegerField(default=10)
     
+    # Denormalized number of bookings in Booking.COUNTED_STATUSES, kept
+    # current by booking.signals. Read when BOOKING_DENORMALIZED_COUNTS is on.
+    total_bookings_count = models.PositiveIntegerField(default=0, editable=False)
+    
     # Staff assignment
     available_staff = models.ManyToManyField(User, related_name='available_services', blank=True)
     
@@ -95,6 +99,9 @@ class Booking(models.Model):
         ('no_show', 'No Show'),
     ]
     
+    # Statuses counted by Service.total_bookings_count
+    COUNTED_STATUSES = ['confirmed', 'completed']
+    
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('paid', 'Paid'),
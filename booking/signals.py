@@ -0,0 +1,35 @@
+# booking/signals.py
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Service, Booking
+
+
+def refresh_total_bookings_count(service_ids=None):
+    """Recompute Service.total_bookings_count in one UPDATE (all services if no ids)"""
+    counts = (
+        Booking.objects
+        .filter(service=OuterRef('pk'), status__in=Booking.COUNTED_STATUSES)
+        .order_by()
+        .values('service')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    services = Service.objects.all()
+    if service_ids is not None:
+        services = services.filter(pk__in=service_ids)
+    return services.update(total_bookings_count=Coalesce(Subquery(counts), 0))
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Saves that do not touch the status cannot change the count
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    refresh_total_bookings_count([instance.service_id])
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    refresh_total_bookings_count([instance.service_id])
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.5 on 2026-10-17 11:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100, unique=True)),
+                ('payment_method', models.CharField(choices=[('vnpay', 'VNPAY'), ('momo', 'MoMo'), ('zalopay', 'ZaloPay'), ('cash', 'Cash')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('currency', models.CharField(default='VND', max_length=3)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='pending', max_length=20)),
+                ('gateway_transaction_id', models.CharField(blank=True, max_length=200)),
+                ('gateway_response_code', models.CharField(blank=True, max_length=10)),
+                ('gateway_response_message', models.TextField(blank=True)),
+                ('payment_url', models.URLField(blank=True)),
+                ('return_url', models.URLField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_transactions', to='booking.booking')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]